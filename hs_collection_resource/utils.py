@@ -7,7 +7,7 @@ import logging
 from django.core.files.uploadedfile import UploadedFile
 
 from hs_core.hydroshare.utils import resource_modified, current_site_url
-from hs_core.hydroshare.resource import delete_resource_file_only, add_resource_files
+from hs_core.hydroshare.resource import delete_resource_files_only, add_resource_files
 
 logger = logging.getLogger(__name__)
 RES_LANDING_PAGE_URL_TEMPLATE = current_site_url() + "/resource/{0}/"
@@ -61,8 +61,7 @@ def update_collection_list_csv(collection_obj):
         # remove all files in bag
         # The only possible file is a .csv file.
         # It is removed before another is added.
-        for f in collection_obj.files.all():
-            delete_resource_file_only(collection_obj, f)
+        delete_resource_files_only(collection_obj, collection_obj.files.all())
 
         if collection_obj.resources.count() > 0 or collection_obj.deleted_resources.count() > 0:
             # prepare csv content
@@ -1,11 +1,16 @@
 import os
 import zipfile
 import shutil
+import tempfile
 import logging
 import requests
-import json
 import datetime
 import base64
+import binascii
+import threading
+from multiprocessing.pool import ThreadPool
+from contextlib import contextmanager
+from functools import partial
 from uuid import uuid4
 
 
@@ -14,10 +19,16 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.core.files import File
 from django.core.files.uploadedfile import UploadedFile
 from django.core.exceptions import ValidationError, PermissionDenied
-from django.db import transaction
+from django.db import connection, transaction
+from django.db.models import Prefetch, Q, prefetch_related_objects
+from django.utils.encoding import force_text
+from django.utils.timezone import now
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
 from rest_framework import status
 
-from hs_core.models import ResourceFile
+from hs_core.models import BaseResource, Identifier, Relation, ResourceFile, Title, \
+    get_resource_file_path
 from hs_core import signals
 from hs_core.hydroshare import utils
 from hs_access_control.models import ResourceAccess, UserResourcePrivilege, PrivilegeCodes
@@ -33,9 +44,21 @@ METADATA_STATUS_INSUFFICIENT = 'Insufficient to publish or make public'
 
 logger = logging.getLogger(__name__)
 
+# HTTP session shared by the DataCite and FairShake calls made when publishing, so that
+# consecutive calls reuse kept-alive connections instead of repeating TCP and TLS handshakes
+_publish_http = requests.Session()
+_publish_http.mount('https://', HTTPAdapter(pool_maxsize=32,
+                                            max_retries=Retry(total=3, backoff_factor=0.2)))
+
+
 class PublishException(Exception):
     pass
 
+
+PUBLISH_REQUIREMENTS_MESSAGE = "This resource cannot be published since it does not have " \
+    "required metadata or content files or this resource type is not allowed for publication."
+
+
 def get_resource(pk):
     """
     Retrieve an instance of type Bags associated with the resource identified by **pk**
@@ -48,7 +71,7 @@ def get_resource(pk):
     Exceptions.NotFound - The resource identified by pid does not exist
     """
 
-    return utils.get_resource_by_shortkey(pk).baseresource.bags.first()
+    return utils.get_resource_by_shortkey_cached(pk).baseresource.bags.first()
 
 
 def get_science_metadata(pk):
@@ -69,7 +92,7 @@ def get_science_metadata(pk):
     Exceptions.NotFound  - The resource identified by pid does not exist
     Exception.ServiceFailure  - The service is unable to process the request
     """
-    res = utils.get_resource_by_shortkey(pk)
+    res = utils.get_resource_by_shortkey_cached(pk)
     return res.metadata.get_xml()
 
 
@@ -89,7 +112,7 @@ def get_capabilities(pk):
     Exceptions.NotFound - The resource identified by pid does not exist
     Exception.ServiceFailure - The service is unable to process the request
     """
-    res = utils.get_resource_by_shortkey(pk)
+    res = utils.get_resource_by_shortkey_cached(pk)
     return getattr(res, 'extra_capabilities', lambda: None)()
 
 
@@ -113,14 +136,19 @@ def get_resource_file(pk, filename):
     does not exist
     Exception.ServiceFailure - The service is unable to process the request
     """
-    resource = utils.get_resource_by_shortkey(pk)
-    for f in ResourceFile.objects.filter(object_id=resource.id):
-        if f.reference_file_path:
-            if f.reference_file_path[1:] == filename:
-                return f
-        elif os.path.basename(f.resource_file.name) == filename:
-            return f.resource_file
-    raise ObjectDoesNotExist(filename)
+    resource = utils.get_resource_by_shortkey_cached(pk)
+    # match in the database rather than scanning every file of the resource; a stored file
+    # matches on its base name only, so a name containing '/' can only be a reference path
+    name_filter = Q(reference_file_path='/' + filename)
+    if '/' not in filename:
+        name_filter |= Q(resource_file__endswith='/' + filename) | Q(resource_file=filename)
+    f = ResourceFile.objects.filter(object_id=resource.id).filter(name_filter) \
+        .only('object_id', 'content_type', 'reference_file_path', 'resource_file').first()
+    if f is None:
+        raise ObjectDoesNotExist(filename)
+    if f.reference_file_path:
+        return f
+    return f.resource_file
 
 
 def update_resource_file(pk, filename, f):
@@ -145,17 +173,20 @@ def update_resource_file(pk, filename, f):
     Exception.ServiceFailure - The service is unable to process the request
     """
     # TODO: does not update metadata; does not check resource state
-    resource = utils.get_resource_by_shortkey(pk)
-    for rf in ResourceFile.objects.filter(object_id=resource.id):
-        if rf.short_path == filename:
-            if rf.resource_file:
-                # TODO: should use delete_resource_file
-                rf.resource_file.delete()
-                # TODO: should use add_file_to_resource
-                rf.resource_file = File(f) if not isinstance(f, UploadedFile) else f
-                rf.save()
-            return rf
-    raise ObjectDoesNotExist(filename)
+    resource = utils.get_resource_by_shortkey_cached(pk)
+    # short_path is either the reference path or the storage path relative to the resource
+    rf = ResourceFile.objects.filter(object_id=resource.id).filter(
+        Q(reference_file_path=filename) |
+        Q(resource_file=get_resource_file_path(resource, filename))).first()
+    if rf is None:
+        raise ObjectDoesNotExist(filename)
+    if rf.resource_file:
+        # TODO: should use delete_resource_file
+        rf.resource_file.delete()
+        # TODO: should use add_file_to_resource
+        rf.resource_file = File(f) if not isinstance(f, UploadedFile) else f
+        rf.save()
+    return rf
 
 
 def get_related(pk):
@@ -216,34 +247,21 @@ def check_resource_files(files=()):
              and False if not, and sum_size is the size summation over all files if status is
              True, and -1 if status is False
     """
-    sum = 0
+    total = 0
     for file in files:
-        if not isinstance(file, UploadedFile):
-            # if file is already on the server, e.g., a file transferred directly from iRODS,
-            # the file should not be subject to file size check since the file size check is
-            # only prompted by file upload limit
-            if hasattr(file, '_size'):
-                sum += int(file._size)
-            elif hasattr(file, 'size'):
-                sum += int(file.size)
-            else:
-                try:
-                    size = os.stat(file).st_size
-                except (TypeError, OSError):
-                    size = 0
-                sum += size
-            continue
-        if hasattr(file, '_size') and file._size is not None:
-            size = int(file._size)
-        elif hasattr(file, 'size') and file.size is not None:
-            size = int(file.size)
-        else:
+        size = getattr(file, '_size', None)
+        if size is None:
+            size = getattr(file, 'size', None)
+        if size is None:
+            # a file already on the server, e.g., a file transferred directly from iRODS,
+            # may be given as a path rather than as a file object
+            path = file.name if isinstance(file, UploadedFile) else file
             try:
-                size = int(os.stat(file.name).st_size)
+                size = os.stat(path).st_size
             except (TypeError, OSError):
                 size = 0
-        sum += size
-    return True, sum
+        total += int(size)
+    return True, total
 
 
 def check_resource_type(resource_type):
@@ -253,23 +271,122 @@ def check_resource_type(resource_type):
     Parameters:
     resource_type: the resource type string to check
     Returns:  the resource type class matching the resource type string; if no match is found,
-    returns None
+    raises NotImplementedError
     """
+    # get_resource_types() is memoized, so this scans the few resource classes rather than
+    # every installed model
     for tp in utils.get_resource_types():
         if resource_type == tp.__name__:
-            res_cls = tp
-            break
+            return tp
+    raise NotImplementedError("Type {resource_type} does not exist".format(
+        resource_type=resource_type))
+
+
+# short ids awaiting a full text search notification in the current
+# _coalesce_fts_notifications() block of this thread
+_fts_pending = threading.local()
+
+
+@contextmanager
+def _coalesce_fts_notifications():
+    """
+    Collect the full text search notifications requested inside the block and register one
+    notification per resource when the block exits, however many changes it made. Nothing is
+    registered if the block raises. A nested block defers to the outermost one.
+    """
+    if getattr(_fts_pending, 'short_ids', None) is not None:
+        yield
+        return
+    _fts_pending.short_ids = set()
+    try:
+        yield
+        short_ids = _fts_pending.short_ids
+    finally:
+        _fts_pending.short_ids = None
+    for short_id in short_ids:
+        transaction.on_commit(partial(notify_fts_indexer, short_id))
+
+
+def _notify_fts_indexer_on_commit(short_id):
+    """
+    Notify the full text search indexer once the current transaction commits, so that it never
+    sees uncommitted data and a failed transaction is not indexed. Inside a
+    _coalesce_fts_notifications() block the notification is merged with the others for the
+    same resource.
+    """
+    short_ids = getattr(_fts_pending, 'short_ids', None)
+    if short_ids is not None:
+        short_ids.add(short_id)
     else:
-        raise NotImplementedError("Type {resource_type} does not exist".format(
-            resource_type=resource_type))
-    return res_cls
+        transaction.on_commit(partial(notify_fts_indexer, short_id))
+
+
+# buffer size used when an upload has to be copied into the shared temp space
+STAGE_UPLOAD_BUFSIZE = 16 * 1024 * 1024
+
+
+def _copy_file(src, dst):
+    """
+    Copy the contents of file src to dst. Where os.sendfile is available the kernel copies
+    the data directly; otherwise it is streamed in STAGE_UPLOAD_BUFSIZE chunks.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        if hasattr(os, 'sendfile'):
+            in_fd, out_fd = fsrc.fileno(), fdst.fileno()
+            offset = 0
+            try:
+                while True:
+                    sent = os.sendfile(out_fd, in_fd, offset, 1 << 30)
+                    if sent == 0:
+                        return
+                    offset += sent
+            except OSError:
+                # sendfile is not supported between these files; copy the rest in user space
+                fsrc.seek(offset)
+                fdst.seek(offset)
+        shutil.copyfileobj(fsrc, fdst, STAGE_UPLOAD_BUFSIZE)
+
+
+def _stage_upload(src, tmp_dir):
+    """
+    Place the uploaded file src into tmp_dir and return its new path.
+
+    The upload is hard linked when possible, which takes no time or extra space regardless
+    of the file size. A copy is made only when tmp_dir is on another file system (or linking
+    is otherwise refused).
+    """
+    dst = os.path.join(tmp_dir, os.path.basename(src))
+    try:
+        os.link(src, dst)
+    except OSError as ex:
+        logger.debug("Cannot link %s to %s (%s); copying instead", src, dst, ex)
+        _copy_file(src, dst)
+    return dst
+
+
+def _looks_like_zip(f):
+    """
+    Check whether the uploaded file f is a zip file by looking for the end of central
+    directory signature in its tail, so at most the last 64 KiB of the file are read.
+    The read position of f is left unchanged.
+    """
+    size = getattr(f, 'size', None)
+    if size is None:
+        return zipfile.is_zipfile(f)
+    pos = f.tell()
+    try:
+        # the end of central directory record is 22 bytes plus a comment of up to 64 KiB
+        f.seek(max(0, size - (22 + 65535)))
+        return b'PK\x05\x06' in f.read()
+    finally:
+        f.seek(pos)
 
 
 def add_zip_file_contents_to_resource_async(resource, f):
     """
     Launch asynchronous celery task to add zip file contents to a resource.
-    Note: will copy the zip file into a temporary space accessible to both
-    the Django server and the Celery worker.
+    Note: will link (or, across file systems, copy) the zip file into a temporary space
+    accessible to both the Django server and the Celery worker.
     :param resource: Resource to which file should be added
     :param f: TemporaryUploadedFile object (or object that implements temporary_file_path())
      representing a zip file whose contents are to be added to a resource.
@@ -278,11 +395,9 @@ def add_zip_file_contents_to_resource_async(resource, f):
     # has finished.
     uploaded_filepath = f.temporary_file_path()
     tmp_dir = getattr(settings, 'HYDROSHARE_SHARED_TEMP', '/shared_tmp')
-    logger.debug("Copying uploaded file from {0} to {1}".format(uploaded_filepath,
-                                                                tmp_dir))
-    shutil.copy(uploaded_filepath, tmp_dir)
-    zfile_name = os.path.join(tmp_dir, os.path.basename(uploaded_filepath))
-    logger.debug("Retained upload as {0}".format(zfile_name))
+    logger.debug("Copying uploaded file from %s to %s", uploaded_filepath, tmp_dir)
+    zfile_name = _stage_upload(uploaded_filepath, tmp_dir)
+    logger.debug("Retained upload as %s", zfile_name)
     # Import here to avoid circular reference
     from hs_core.tasks import add_zip_file_contents_to_resource
     add_zip_file_contents_to_resource.apply_async((resource.short_id, zfile_name),
@@ -359,10 +474,16 @@ def create_resource(
     if __debug__:
         assert(isinstance(source_names, list))
 
-    with transaction.atomic():
+    with transaction.atomic(), _coalesce_fts_notifications():
         cls = check_resource_type(resource_type)
         owner = utils.user_from_id(owner)
 
+        # assign the short id up front so that the slug and extra metadata go into the
+        # initial INSERT instead of being written by follow-up saves
+        res_short_id = kwargs.pop('short_id', None) or uuid4().hex
+        if extra_metadata is not None:
+            kwargs['extra_metadata'] = extra_metadata
+
         # create the resource
         resource = cls.objects.create(
             resource_type=resource_type,
@@ -371,23 +492,15 @@ def create_resource(
             title=title,
             last_changed_by=owner,
             in_menus=[],
+            short_id=res_short_id,
+            slug='resource/' + res_short_id,
             **kwargs
         )
 
-        resource.resource_type = resource_type
-
-        # by default make resource private
-        resource.slug = 'resource{0}{1}'.format('/', resource.short_id)
-        resource.save()
-
         if not metadata:
             metadata = []
 
-        if extra_metadata is not None:
-            resource.extra_metadata = extra_metadata
-            resource.save()
-
-        if len(files) == 1 and unpack_file and zipfile.is_zipfile(files[0]):
+        if len(files) == 1 and unpack_file and _looks_like_zip(files[0]):
             # Add contents of zipfile as resource files asynchronously
             # Note: this is done asynchronously as unzipping may take
             # a long time (~15 seconds to many minutes).
@@ -420,23 +533,19 @@ def create_resource(
         resource_labels.save()
 
         if edit_users:
-            for user in edit_users:
-                user = utils.user_from_id(user)
+            for user in utils.users_from_ids(edit_users):
                 owner.uaccess.share_resource_with_user(resource, user, PrivilegeCodes.CHANGE)
 
         if view_users:
-            for user in view_users:
-                user = utils.user_from_id(user)
+            for user in utils.users_from_ids(view_users):
                 owner.uaccess.share_resource_with_user(resource, user, PrivilegeCodes.VIEW)
 
         if edit_groups:
-            for group in edit_groups:
-                group = utils.group_from_id(group)
+            for group in utils.groups_from_ids(edit_groups):
                 owner.uaccess.share_resource_with_group(resource, group, PrivilegeCodes.CHANGE)
 
         if view_groups:
-            for group in view_groups:
-                group = utils.group_from_id(group)
+            for group in utils.groups_from_ids(view_groups):
                 owner.uaccess.share_resource_with_group(resource, group, PrivilegeCodes.VIEW)
 
         if create_metadata:
@@ -444,18 +553,23 @@ def create_resource(
             utils.prepare_resource_default_metadata(resource=resource, metadata=metadata,
                                                     res_title=title)
 
-            for element in metadata:
-                # here k is the name of the element
-                # v is a dict of all element attributes/field names and field values
-                k, v = element.items()[0]
-                resource.metadata.create_element(k, **v)
+            # each element is a dict with the element name as its only key and a dict of the
+            # element attributes/field names and field values as its value
+            res_metadata = resource.metadata
+            elements = res_metadata.create_elements(next(iter(element.items()))
+                                                    for element in metadata)
 
-            for keyword in keywords:
-                resource.metadata.create_element('subject', value=keyword)
+            res_metadata.create_elements(('subject', {'value': keyword}) for keyword in keywords)
 
-            resource.title = resource.metadata.title.value
-            resource.save()
+            # take the title from the element just created rather than querying for it; the
+            # resource only needs saving again when a title in metadata overrode the given one
+            res_title = next(el.value for el in elements if isinstance(el, Title))
+            if res_title != resource.title:
+                resource.title = res_title
+                resource.save()
 
+        if settings.FTS_URL:
+            _notify_fts_indexer_on_commit(resource.short_id)
 
     if settings.USE_IRODS:
         # set the resource to private
@@ -466,8 +580,6 @@ def create_resource(
 
         # set quota of this resource to this creator
         resource.set_quota_holder(owner, owner)
-    if settings.FTS_URL:
-        notify_fts_indexer(resource.short_id)
     return resource
 
 
@@ -486,7 +598,7 @@ def create_empty_resource(pk, user, action='version'):
         the empty new resource that is created as an initial new version or copy for the original
         resource which is then further populated with metadata and content in a subsequent step.
     """
-    res = utils.get_resource_by_shortkey(pk)
+    res = utils.get_resource_by_shortkey_cached(pk)
     if action == 'version':
         if not user.uaccess.owns_resource(res):
             raise PermissionDenied('Only resource owners can create new versions')
@@ -529,14 +641,15 @@ def copy_resource(ori_res, new_res):
 
     utils.copy_and_create_metadata(ori_res, new_res)
 
-    hs_identifier = ori_res.metadata.identifiers.all().filter(name="hydroShareIdentifier")[0]
+    hs_identifier = ori_res.metadata.identifiers.filter(name="hydroShareIdentifier") \
+        .only('url').first()
     if hs_identifier:
         new_res.metadata.create_element('source', derived_from=hs_identifier.url)
 
     if ori_res.resource_type.lower() == "collectionresource":
         # clone contained_res list of original collection and add to new collection
         # note that new collection will not contain "deleted resources"
-        new_res.resources = ori_res.resources.all()
+        new_res.resources.set(list(ori_res.resources.values_list('pk', flat=True)))
 
     return new_res
 
@@ -561,24 +674,37 @@ def create_new_version_resource(ori_res, new_res, user):
     # copy metadata from source resource to target new-versioned resource except three elements
     utils.copy_and_create_metadata(ori_res, new_res)
 
+    # each access to resource.metadata queries the database, so hold on to the metadata
+    # objects and fetch the elements needed below up front: the hydroShareIdentifier of both
+    # resources in one query and the isVersionOf relations of the new resource in another
+    ori_md = ori_res.metadata
+    new_md = new_res.metadata
+    prefetch_related_objects(
+        [ori_md, new_md],
+        Prefetch('identifiers', to_attr='hs_identifiers',
+                 queryset=Identifier.objects.filter(name="hydroShareIdentifier")))
+    prefetch_related_objects(
+        [new_md],
+        Prefetch('relations', to_attr='version_of_relations',
+                 queryset=Relation.objects.filter(type='isVersionOf')))
+
     # add or update Relation element to link source and target resources
-    hs_identifier = new_res.metadata.identifiers.all().filter(name="hydroShareIdentifier")[0]
-    ori_res.metadata.create_element('relation', type='isReplacedBy', value=hs_identifier.url)
+    hs_identifier = new_md.hs_identifiers[0]
+    ori_md.create_element('relation', type='isReplacedBy', value=hs_identifier.url)
 
-    if new_res.metadata.relations.all().filter(type='isVersionOf').exists():
+    for relation in new_md.version_of_relations:
         # the original resource is already a versioned resource, and its isVersionOf relation
         # element is copied over to this new version resource, needs to delete this element so
         # it can be created to link to its original resource correctly
-        eid = new_res.metadata.relations.all().filter(type='isVersionOf').first().id
-        new_res.metadata.delete_element('relation', eid)
+        new_md.delete_element('relation', relation.id)
 
-    hs_identifier = ori_res.metadata.identifiers.all().filter(name="hydroShareIdentifier")[0]
-    new_res.metadata.create_element('relation', type='isVersionOf', value=hs_identifier.url)
+    hs_identifier = ori_md.hs_identifiers[0]
+    new_md.create_element('relation', type='isVersionOf', value=hs_identifier.url)
 
     if ori_res.resource_type.lower() == "collectionresource":
         # clone contained_res list of original collection and add to new collection
         # note that new version collection will not contain "deleted resources"
-        new_res.resources = ori_res.resources.all()
+        new_res.resources.set(list(ori_res.resources.values_list('pk', flat=True)))
 
     # since an isReplaceBy relation element is added to original resource, needs to call
     # resource_modified() for original resource
@@ -630,14 +756,19 @@ def add_resource_files(resource, *files, **kwargs):
             print("kwargs[{}]".format(k))
         assert len(kwargs) == 0
 
+    metadata_files = []
+    content_files = []
+    is_metadata = []
     for f in files:
-        file_ext = os.path.splitext(f.name)[1]
-        if file_ext.lower() == '.jsonld':
-            # treat the file as semantic metadata
-            utils.harvest_ontology_ids_from_metadata(resource, f)
-            ret.append(utils.add_file_to_resource(resource, f, folder='metadata'))
-        else:
-            ret.append(utils.add_file_to_resource(resource, f, folder=folder))
+        # treat .jsonld files as semantic metadata
+        is_metadata.append(f.name.lower().endswith('.jsonld'))
+        (metadata_files if is_metadata[-1] else content_files).append(f)
+    if metadata_files:
+        utils.harvest_ontology_ids_from_metadata_bulk(resource, metadata_files)
+    # add each group with one INSERT, but return the added files in the order they were given
+    added_metadata = iter(utils.add_files_to_resource(resource, metadata_files, folder='metadata'))
+    added_content = iter(utils.add_files_to_resource(resource, content_files, folder=folder))
+    ret.extend(next(added_metadata) if md else next(added_content) for md in is_metadata)
 
     if len(source_names) > 0:
         if len(source_names) != len(source_sizes):
@@ -660,7 +791,7 @@ def add_resource_files(resource, *files, **kwargs):
     utils.create_empty_contents_directory(resource)
 
     if settings.FTS_URL:
-        notify_fts_indexer(resource.short_id)
+        _notify_fts_indexer_on_commit(resource.short_id)
 
     return ret
 
@@ -704,7 +835,7 @@ def update_science_metadata(pk, metadata, user):
 
     Returns:
     """
-    resource = utils.get_resource_by_shortkey(pk)
+    resource = utils.get_resource_by_shortkey_cached(pk)
     resource.metadata.update(metadata, user)
     utils.resource_modified(resource, user, overwrite_bag=False)
 
@@ -712,6 +843,16 @@ def update_science_metadata(pk, metadata, user):
     resource.update_public_and_discoverable()  # set to False if necessary
 
 
+def _lock_resource(pk):
+    """
+    Lock the database row of the resource identified by pk until the current transaction ends,
+    so that concurrent deletes or publications of the same resource run one after another
+    """
+    list(BaseResource.objects.select_for_update().filter(short_id=pk).values_list('pk',
+                                                                                  flat=True))
+
+
+@transaction.atomic
 def delete_resource(pk):
     """
     Deletes a resource managed by CommonsShare. The caller must be an owner of the resource or an
@@ -739,33 +880,39 @@ def delete_resource(pk):
     Note:  Only CommonsShare administrators will be able to delete formally published resour
     """
 
+    _lock_resource(pk)
     res = utils.get_resource_by_shortkey(pk)
+    utils.clear_resource_cache(pk)
 
-    if res.metadata.relations.all().filter(type='isReplacedBy').exists():
+    # fetch both relation types that matter here in one query
+    relations = {}
+    rel_qs = res.metadata.relations.filter(type__in=['isReplacedBy', 'isVersionOf'])
+    for rel_type, rel_value in rel_qs.order_by('id').values_list('type', 'value'):
+        relations.setdefault(rel_type, rel_value)
+
+    if 'isReplacedBy' in relations:
         raise ValidationError('An obsoleted resource in the middle of the obsolescence chain '
                               'cannot be deleted.')
 
     # when the most recent version of a resource in an obsolescence chain is deleted, the previous
     # version in the chain needs to be set as the "active" version by deleting "isReplacedBy"
     # relation element
-    if res.metadata.relations.all().filter(type='isVersionOf').exists():
-        is_version_of_res_link = \
-            res.metadata.relations.all().filter(type='isVersionOf').first().value
-        idx = is_version_of_res_link.rindex('/')
-        if idx == -1:
-            obsolete_res_id = is_version_of_res_link
-        else:
-            obsolete_res_id = is_version_of_res_link[idx+1:]
+    if 'isVersionOf' in relations:
+        # the link ends with the short id of the previous version; it is the whole link if
+        # there is no '/'
+        obsolete_res_id = relations['isVersionOf'].rpartition('/')[2]
         obsolete_res = utils.get_resource_by_shortkey(obsolete_res_id)
-        if obsolete_res.metadata.relations.all().filter(type='isReplacedBy').exists():
-            eid = obsolete_res.metadata.relations.all().filter(type='isReplacedBy').first().id
-            obsolete_res.metadata.delete_element('relation', eid)
+        obsolete_md = obsolete_res.metadata
+        eid = obsolete_md.relations.filter(type='isReplacedBy').values_list('id', flat=True) \
+            .first()
+        if eid is not None:
+            obsolete_md.delete_element('relation', eid)
             # also make this obsoleted resource editable now that it becomes the latest version
             obsolete_res.raccess.immutable = False
             obsolete_res.raccess.save()
     res.delete()
     if settings.FTS_URL:
-        notify_fts_indexer(pk)
+        _notify_fts_indexer_on_commit(pk)
 
     return pk
 
@@ -796,10 +943,37 @@ def delete_resource_file_only(resource, f):
     short_path = f.short_path
     f.delete()
     if settings.FTS_URL:
-        notify_fts_indexer(resource.short_id)
+        _notify_fts_indexer_on_commit(resource.short_id)
     return short_path
 
 
+def delete_resource_files_only(resource, files):
+    """
+    Delete several resource files from the resource like delete_resource_file_only() does for
+    one, but remove their records with a single DELETE and notify the indexer only once.
+    Args:
+        resource: the resource from which the files are to be deleted
+        files: iterable of the ResourceFile objects to be deleted
+    Returns: list of unqualified relative paths to the files that have been deleted
+    """
+    files = list(files)
+    short_paths = []
+    for f in files:
+        # spare each file a query for its resource
+        f.content_object = resource
+        short_paths.append(f.short_path)
+        if f.exists:
+            if f.resource_file:
+                f.resource_file.delete(save=False)
+    if files:
+        # nothing depends on ResourceFile rows and no delete signals are connected for them,
+        # so the deletion collector removes them all with a single DELETE
+        ResourceFile.objects.filter(pk__in=[f.pk for f in files]).delete()
+        if settings.FTS_URL:
+            _notify_fts_indexer_on_commit(resource.short_id)
+    return short_paths
+
+
 def delete_format_metadata_after_delete_file(resource, file_name):
     """
     delete format metadata as appropriate after a file is deleted.
@@ -812,28 +986,32 @@ def delete_format_metadata_after_delete_file(resource, file_name):
 
     # if there is no other resource file with the same extension as the
     # file just deleted then delete the matching format metadata element for the resource
-    resource_file_extensions = [os.path.splitext(get_resource_file_name(f))[1] for f in
-                                resource.files.all()]
-    if delete_file_extension not in resource_file_extensions:
-        format_element = resource.metadata.formats.filter(value=delete_file_mime_type).first()
-        if format_element:
-            resource.metadata.delete_element(format_element.term, format_element.id)
+    if delete_file_extension:
+        extension_in_use = resource.files.filter(
+            resource_file__endswith=delete_file_extension).exists()
+    else:
+        # files without an extension cannot be told apart by a suffix match
+        extension_in_use = any(not os.path.splitext(name)[1] for name in
+                               resource.files.values_list('resource_file', flat=True))
+    if not extension_in_use:
+        resource.metadata.formats.filter(value=delete_file_mime_type).delete()
 
 
 # TODO: test in-folder delete of short path
-def filter_condition(filename_or_id, fl):
+def file_filter(resource, filename_or_id):
     """
-    Converted lambda definition of filter_condition into def to conform to pep8 E731 rule: do not
-    assign a lambda expression, use a def
+    Build the query condition selecting a file of resource by id or by short path, so that the
+    match is made by the database rather than by loading and testing every file
+    :param resource: the resource containing the file
     :param filename_or_id: passed in filename_or id as the filter
-    :param fl: the ResourceFile object to filter against
-    :return: boolean indicating whether fl conforms to filename_or_id
+    :return: Q object that matches the ResourceFile identified by filename_or_id
     """
     try:
-        file_id = int(filename_or_id)
-        return fl.id == file_id
+        return Q(id=int(filename_or_id))
     except ValueError:
-        return fl.short_path == filename_or_id
+        # short_path is either the reference path or the storage path relative to the resource
+        return Q(reference_file_path=filename_or_id) | \
+            Q(resource_file=get_resource_file_path(resource, filename_or_id))
 
 
 # TODO: Remove option for file id, not needed since names are unique.
@@ -868,38 +1046,62 @@ def delete_resource_file(pk, filename_or_id, user, delete_logical_file=True):
     resource = utils.get_resource_by_shortkey(pk)
     res_cls = resource.__class__
 
-    for f in ResourceFile.objects.filter(object_id=resource.id):
-        if filter_condition(filename_or_id, f):
-            if delete_logical_file:
-                if f.logical_file is not None:
-                    # logical_delete() calls this function (delete_resource_file())
-                    # to delete each of its contained ResourceFile objects
-                    f.logical_file.logical_delete(user)
-                    return filename_or_id
+    f = ResourceFile.objects.filter(object_id=resource.id) \
+        .filter(file_filter(resource, filename_or_id)).first()
+    if f is None:
+        raise ObjectDoesNotExist(str.format("resource {}, file {} not found",
+                                            resource.short_id, filename_or_id))
+
+    if delete_logical_file:
+        if f.logical_file is not None:
+            # logical_delete() calls this function (delete_resource_file())
+            # to delete each of its contained ResourceFile objects
+            with _coalesce_fts_notifications():
+                f.logical_file.logical_delete(user)
+            return filename_or_id
+
+    signals.pre_delete_file_from_resource.send(sender=res_cls, file=f,
+                                               resource=resource, user=user)
 
-            signals.pre_delete_file_from_resource.send(sender=res_cls, file=f,
-                                                       resource=resource, user=user)
+    # Pabitra: better to use f.delete() here and get rid of the
+    # delete_resource_file_only() util function
+    file_name = delete_resource_file_only(resource, f)
 
-            # Pabitra: better to use f.delete() here and get rid of the
-            # delete_resource_file_only() util function
-            file_name = delete_resource_file_only(resource, f)
+    # This presumes that the file is no longer in django
+    delete_format_metadata_after_delete_file(resource, file_name)
 
-            # This presumes that the file is no longer in django
-            delete_format_metadata_after_delete_file(resource, file_name)
+    signals.post_delete_file_from_resource.send(sender=res_cls, resource=resource)
 
-            signals.post_delete_file_from_resource.send(sender=res_cls, resource=resource)
+    # set to private if necessary -- AFTER post_delete_file handling
+    resource.update_public_and_discoverable()  # set to False if necessary
 
-            # set to private if necessary -- AFTER post_delete_file handling
-            resource.update_public_and_discoverable()  # set to False if necessary
+    # generate bag
+    utils.resource_modified(resource, user, overwrite_bag=False)
 
-            # generate bag
-            utils.resource_modified(resource, user, overwrite_bag=False)
+    return filename_or_id
 
-            return filename_or_id
 
-    # if execution gets here, file was not found
-    raise ObjectDoesNotExist(str.format("resource {}, file {} not found",
-                                        resource.short_id, filename_or_id))
+def _get_irods_sha256(istorage, srcfile):
+    """
+    Return the hex SHA-256 digest of the iRODS file srcfile. The checksum iRODS keeps for the
+    file is used when it is a SHA-256 one; only otherwise (e.g., the zone is configured for MD5
+    checksums) is the file downloaded to a temporary directory to compute the digest locally.
+    """
+    try:
+        checksum = istorage.checksum(srcfile)
+    except SessionException as ex:
+        logger.error(ex.stderr)
+        checksum = None
+    if checksum is not None and checksum.startswith('sha2:'):
+        return binascii.hexlify(base64.b64decode(checksum[5:])).decode('ascii')
+    tmpdir = tempfile.mkdtemp(dir=settings.TEMP_FILE_DIR)
+    try:
+        tmpfile = os.path.join(tmpdir, os.path.basename(srcfile))
+        istorage.getFile(srcfile, tmpfile)
+        return mca.compute_checksum(tmpfile)
+    finally:
+        shutil.rmtree(tmpdir)
+
 
 def publish_resource(user, pk, publish_type):
     """
@@ -924,36 +1126,117 @@ def publish_resource(user, pk, publish_type):
     and other general exceptions
 
     Note:  This is different than just giving public access to a resource via access control rule
+
+    The resource row is only locked while the publication is claimed and while it is recorded.
+    The calls to the identifier services and FairShake, and the bag creation, run in between
+    without holding a transaction open; a concurrent request to publish the resource finds its
+    publish_status 'Running' and is refused, unless that claim has expired.
     """
+    with transaction.atomic():
+        _lock_resource(pk)
+        resource = utils.get_resource_by_shortkey(pk)
+        if resource.raccess.published:
+            refusal = 'Done', "This resource is already published."
+        elif resource.publish_status == 'Running' and resource.publication_in_progress:
+            # the status belongs to the task that is publishing the resource; leave it alone
+            raise ValidationError("This resource is already being published.")
+        # TODO: whether a resource can be published is not considered in can_be_published
+        # TODO: can_be_published is currently an alias for can_be_public_or_discoverable
+        elif not resource.can_be_published:
+            refusal = 'Error', PUBLISH_REQUIREMENTS_MESSAGE
+        else:
+            refusal = None
+            _set_publish_status(pk, 'Running')
+    if refusal is not None:
+        # settle the 'Pending' status the publish view set
+        publish_status, message = refusal
+        _set_publish_status(pk, publish_status, message)
+        raise ValidationError(message)
 
-    resource_id = pk
-    resource = utils.get_resource_by_shortkey(pk)
-    res_coll = resource.root_path
-    istorage = resource.get_irods_storage()
-    resource_url = '{0}/resource/{1}'.format(utils.current_site_url(), resource.short_id)
+    try:
+        ident_md_args = _register_publication(resource, publish_type)
+
+        with transaction.atomic():
+            _lock_resource(pk)
+            # reload the resource so that changes made while it was being registered are kept;
+            # the identifiers were saved as they were registered
+            resource = utils.get_resource_by_shortkey(pk)
+
+            # set the flags first so that they are written by the save in set_public(), which
+            # cannot decline the change since can_be_published was checked above
+            raccess = resource.raccess
+            raccess.immutable = True
+            raccess.shareable = False
+            raccess.published = True
+            resource.set_public(True)  # also sets discoverable to True
+
+            resource.metadata.create_elements([
+                # change "Publisher" element of science metadata to CommonsShare
+                ('Publisher', {'name': 'CommonsShare', 'url': 'https://www.commonsshare.org'}),
+                # create published date
+                ('date', {'type': 'published', 'start_date': now()}),
+                ('Identifier', ident_md_args),
+            ])
+            _set_publish_status(pk, 'Done')
+    except Exception as ex:
+        if isinstance(ex, ValidationError):
+            message = '; '.join(ex.messages)
+        else:
+            message = force_text(ex)
+        _set_publish_status(pk, 'Error', message)
+        raise
 
+    utils.resource_modified(resource, user, overwrite_bag=False)
 
-    # TODO: whether a resource can be published is not considered in can_be_published
-    # TODO: can_be_published is currently an alias for can_be_public_or_discoverable
-    if not resource.can_be_published:
-        raise ValidationError("This resource cannot be published since it does not have required "
-                              "metadata or content files or this resource type is not allowed "
-                              "for publication.")
 
+def _set_publish_status(pk, publish_status, message=None):
+    """Record the progress of the publication of the resource identified by pk"""
+    BaseResource.objects.filter(short_id=pk).update(publish_status=publish_status,
+                                                    publish_message=message,
+                                                    publish_status_updated=now())
 
 
-    dos_url = '{0}/dosapi/dataobjects/{1}/'.format(utils.current_site_url(), resource.short_id)
-    tmpdir = os.path.join(settings.TEMP_FILE_DIR, uuid4().hex)
-    resource_file_manifest_json = get_resource_files_manifest(resource)
+def _register_publication(resource, publish_type):
+    """
+    Register the resource with the identifier service named by publish_type and with FairShake.
+    Each registration is saved as soon as it succeeds and is skipped when the resource already
+    has it, so publishing again after a failure does not mint a second DOI or MINID.
+    :return: the arguments of the Identifier metadata element of the resource's identifier
+    """
+    publish_type = publish_type.lower()
+    if publish_type not in ('doi', 'minid'):
+        raise ValidationError("Unknown publication type {}.".format(publish_type))
+    site_url = utils.current_site_url()
+    resource_url = '{0}/resource/{1}'.format(site_url, resource.short_id)
+
+    if (publish_type == 'minid' and resource.minid) or (publish_type == 'doi' and resource.doi):
+        logger.info("Resource %s already has a %s; not registering it again",
+                    resource.short_id, publish_type)
+    else:
+        _register_identifier(resource, publish_type, site_url, resource_url)
+
+    if resource.assessment_id is None:
+        _register_with_fairshake(resource, resource_url)
+
+    if publish_type == 'minid':
+        return {'name': 'minid',
+                'url': 'http://minid.bd2k.org/minid/landingpage/' + resource.minid +
+                       ', http://n2t.net/' + resource.minid}
+    return {'name': 'doi', 'url': 'https://ors.datacite.org/' + resource.doi}
 
-    os.makedirs(tmpdir)
 
-    # create the remote manifest and metadata files
-    resource_manifest_file = os.path.join(tmpdir, 'resource-file-manifest.json')
-    with open(resource_manifest_file, 'w') as outfile:
-        json.dump(resource_file_manifest_json, outfile)
+def _register_identifier(resource, publish_type, site_url, resource_url):
+    """
+    Mint a MINID or a DOI, as named by publish_type, for the resource and save it
+    """
+    resource_id = resource.short_id
+    res_coll = resource.root_path
+    istorage = resource.get_irods_storage()
 
-    if resource.files.all().count() > 1:
+    dos_url = '{0}/dosapi/dataobjects/{1}/'.format(site_url, resource.short_id)
+    resource_file_manifest_json = get_resource_files_manifest(resource)
+
+    if len(resource_file_manifest_json) > 1:
         if istorage.exists(res_coll):
             bag_modified = istorage.getAVU(res_coll, 'bag_modified')
         else:
@@ -962,15 +1245,12 @@ def publish_resource(user, pk, publish_type):
         if bag_modified is None or bag_modified.lower() == "true":
                 hs_bagit.create_bag(resource)
 
-        tmpfile = os.path.join(tmpdir, 'bag.zip')
-
         bag_full_name = 'bags/{res_id}.zip'.format(res_id=resource_id)
         irods_dest_prefix = settings.IRODS_HOME_COLLECTION
         srcfile = os.path.join(irods_dest_prefix, bag_full_name)
-        istorage.getFile(srcfile, tmpfile)
-        sha_checksum = mca.compute_checksum(tmpfile)
+        sha_checksum = _get_irods_sha256(istorage, srcfile)
         size = istorage.size(srcfile)
-        download_file_url = '{0}/django_irods/download/bags/{1}.zip'.format(utils.current_site_url(),
+        download_file_url = '{0}/django_irods/download/bags/{1}.zip'.format(site_url,
                                                                             resource.short_id)
         file_format = 'application/zip'
     else:
@@ -981,7 +1261,7 @@ def publish_resource(user, pk, publish_type):
 
     locations = [resource_url, download_file_url]
 
-    if publish_type.lower() == "minid":
+    if publish_type == "minid":
         config= mca.parse_config('hydroshare/minid-config.cfg')
         identifier = mca.register_entity(config['minid_server'],
                                     sha_checksum,
@@ -991,9 +1271,7 @@ def publish_resource(user, pk, publish_type):
 
         resource.minid = identifier
         resource.doi = ''
-        ident_md_args = {'name': 'minid',
-               'url': 'http://minid.bd2k.org/minid/landingpage/' + resource.minid + ', http://n2t.net/' + resource.minid}
-    elif publish_type.lower() == "doi":
+    else:
         # create DOI using DataCite API
         doi_put_url = settings.DOI_PUT_URL
         request_data = {}
@@ -1026,9 +1304,10 @@ def publish_resource(user, pk, publish_type):
         request_data['contentUrl'] = [download_file_url, dos_url]
 
         auth_header_str = "Bearer {}".format(settings.DOI_OAUTH_TOKEN)
-        response = requests.put(doi_put_url,
-                                data=json.dumps(request_data),
-                                headers={"Content-Type": "application/json", "Authorization": auth_header_str })
+        response = _publish_http.put(doi_put_url,
+                                     json=request_data,
+                                     headers={"Content-Type": "application/json",
+                                              "Authorization": auth_header_str})
 
         if response.status_code != status.HTTP_200_OK:
             logger.error("Error retrieving DOI from datacite service")
@@ -1036,27 +1315,26 @@ def publish_resource(user, pk, publish_type):
             logger.error(response.text)
             raise PublishException("Unable to retrieve a DOI from DataCite. Resource cannot be published.")
         else:
-            logger.info("response content: " + response.content)
-            return_data = json.loads(response.content)
-            identifier = return_data['@id']
-            resource.doi = identifier
+            logger.info("response content: %s", response.content)
+            return_data = response.json()
+            resource.doi = return_data['@id']
             resource.minid = ''
-            doi_url = 'https://ors.datacite.org/' + identifier
-            ident_md_args = {'name': 'doi',
-                   'url': doi_url}
 
-    # remove the temp directory
-    shutil.rmtree(tmpdir)
+    # save the identifier at once; it is registered even if a later step of publishing fails
+    BaseResource.objects.filter(short_id=resource.short_id).update(minid=resource.minid,
+                                                                   doi=resource.doi)
+
 
-    # register published resource in farishake
+def _register_with_fairshake(resource, resource_url):
+    """Register the resource with FairShake and save the assessment id it is given"""
     #retrieve an API Key to access FairShake registration API
 
     request_data = {}
     request_data['username'] = settings.FAIRSHAKE_USERID
     request_data['password'] = settings.FAIRSHAKE_PASSWORD
-    response = requests.post(settings.FAIRSHAKE_URL +'/auth/login/',
-                            data=json.dumps(request_data),
-                            headers={"Content-Type": "application/json"})
+    response = _publish_http.post(settings.FAIRSHAKE_URL +'/auth/login/',
+                                  json=request_data,
+                                  headers={"Content-Type": "application/json"})
 
     if response.status_code != status.HTTP_200_OK:
         logger.error("Error retrieving APIKey from FairShake API")
@@ -1064,7 +1342,7 @@ def publish_resource(user, pk, publish_type):
         logger.error(response.text)
         raise PublishException("This resource cannot be published because it has failed the FairShake registration process." + response.text)
     else:
-        return_data = json.loads(response.content)
+        return_data = response.json()
         fairshake_apikey = return_data['key']
 
     request_data = {}
@@ -1074,9 +1352,11 @@ def publish_resource(user, pk, publish_type):
     request_data["projects"] = [14]
     request_data["rubrics"] = [11]
 
-    response = requests.post(settings.FAIRSHAKE_URL + '/digital_object/',
-                             data=json.dumps(request_data),
-                             headers={"accept": "application/json", "Content-Type": "application/json", "Authorization": "Token " + fairshake_apikey})
+    response = _publish_http.post(settings.FAIRSHAKE_URL + '/digital_object/',
+                                  json=request_data,
+                                  headers={"accept": "application/json",
+                                           "Content-Type": "application/json",
+                                           "Authorization": "Token " + fairshake_apikey})
     if response.status_code != status.HTTP_201_CREATED:
         logger.error("Error registering resource with FairShake")
         logger.error(response.status_code)
@@ -1084,30 +1364,12 @@ def publish_resource(user, pk, publish_type):
         raise PublishException(
             "This resource cannot be published because it has failed the FairShake registration process." + response.text)
     else:
-        return_data = json.loads(response.content)
+        return_data = response.json()
         assessment_id = return_data['id']
-        logger.info("Created FairShake object with ID: " + repr(assessment_id))
+        logger.info("Created FairShake object with ID: %r", assessment_id)
         resource.assessment_id = assessment_id
-
-    resource.save()
-
-    resource.set_public(True)  # also sets discoverable to True
-    resource.raccess.immutable = True
-    resource.raccess.shareable = False
-    resource.raccess.published = True
-    resource.raccess.save()
-
-    # change "Publisher" element of science metadata to CommonsShare
-    md_args = {'name': 'CommonsShare',
-               'url': 'https://www.commonsshare.org'}
-    resource.metadata.create_element('Publisher', **md_args)
-
-    # create published date
-    resource.metadata.create_element('date', type='published', start_date=resource.updated)
-
-    resource.metadata.create_element('Identifier', **ident_md_args)
-
-    utils.resource_modified(resource, user, overwrite_bag=False)
+        BaseResource.objects.filter(short_id=resource.short_id).update(
+            assessment_id=assessment_id)
 
 
 def resolve_minid(minid):
@@ -1169,7 +1431,7 @@ def create_metadata_element(resource_short_id, element_model_name, **kwargs):
     require a value
     :return:
     """
-    res = utils.get_resource_by_shortkey(resource_short_id)
+    res = utils.get_resource_by_shortkey_cached(resource_short_id)
     res.metadata.create_element(element_model_name, **kwargs)
 
 
@@ -1184,7 +1446,7 @@ def update_metadata_element(resource_short_id, element_model_name, element_id, *
     update
     :return:
     """
-    res = utils.get_resource_by_shortkey(resource_short_id)
+    res = utils.get_resource_by_shortkey_cached(resource_short_id)
     res.metadata.update_element(element_model_name, element_id, **kwargs)
 
 
@@ -1197,54 +1459,111 @@ def delete_metadata_element(resource_short_id, element_model_name, element_id):
     :param element_id: id of the metadata element to be deleted
     :return:
     """
-    res = utils.get_resource_by_shortkey(resource_short_id)
+    res = utils.get_resource_by_shortkey_cached(resource_short_id)
     res.metadata.delete_element(element_model_name, element_id)
 
-def get_resource_files_manifest(resource):
-    data_list = []
 
-    from hs_core.hydroshare import utils
+# number of files whose checksums and sizes are fetched from iRODS concurrently for a manifest
+MANIFEST_WORKERS = 16
 
-    istorage = resource.get_irods_storage()
 
-    for f in ResourceFile.objects.filter(object_id=resource.id):
-        data = {}
+def _recorded_size(reference_file_size):
+    """
+    Return the size recorded for a referenced file, or 0 if none or no valid one was recorded
+    """
+    try:
+        return int(reference_file_size or 0)
+    except ValueError:
+        return 0
 
-        if f.reference_file_path:
-            irods_file_name = f.reference_file_path
-            srcfile = irods_file_name
-            last_sep_pos = irods_file_name.rfind('/')
-            ref_file_name = irods_file_name[last_sep_pos + 1:]
-            fetch_url = '{0}/django_irods/download/{1}'.format(utils.current_site_url(),
-                                                               resource.short_id + irods_file_name)
-        else:
-            irods_file_name = f.storage_path
-            irods_dest_prefix = settings.IRODS_HOME_COLLECTION
-            srcfile = os.path.join(irods_dest_prefix, irods_file_name)
-            fetch_url = '{0}/django_irods/download/{1}'.format(utils.current_site_url(), irods_file_name)
 
+def _get_manifest_entry(istorage, file_storage, row, short_id, site_url, irods_home):
+    """
+    Build the manifest entry of a resource file from its row of
+    (reference_file_path, reference_file_size, resource_file) values. This only talks to
+    the storage, not to the database, so that entries can be built in worker threads.
+    """
+    reference_file_path, reference_file_size, storage_path = row
+    data = {}
+
+    if reference_file_path:
+        irods_file_name = reference_file_path
+        srcfile = irods_file_name
+        last_sep_pos = irods_file_name.rfind('/')
+        ref_file_name = irods_file_name[last_sep_pos + 1:]
+        fetch_url = '{0}/django_irods/download/{1}'.format(site_url, short_id + irods_file_name)
+    else:
+        irods_file_name = storage_path
+        srcfile = os.path.join(irods_home, irods_file_name)
+        fetch_url = '{0}/django_irods/download/{1}'.format(site_url, irods_file_name)
+
+    try:
+        checksum = istorage.checksum(srcfile)
+    except SessionException as ex:
+        logger.error(ex.stderr)
         checksum = None
 
+    data['url'] = fetch_url
+
+    if reference_file_path:
+        # the size recorded when the reference was registered saves an iRODS call
+        data['length'] = _recorded_size(reference_file_size) or istorage.size(srcfile)
+        data['filename'] = ref_file_name
+    else:
+        data['length'] = file_storage.size(storage_path)
+        data['filename'] = os.path.basename(storage_path)
+
+    if checksum is not None:
+        # iRODS reports checksums as e.g. 'sha2:<base64 digest>' or 'md5:<base64 digest>'
+        algorithm, _, digest = checksum.partition(':')
+        digest = binascii.hexlify(base64.b64decode(digest)).decode('ascii')
+        if algorithm.startswith('sha'):
+            data['sha256'] = digest
+        elif algorithm.startswith('md5'):
+            data['md5'] = digest
+
+    return data
+
+
+def get_resource_files_manifest(resource):
+    from hs_core.hydroshare import utils
+
+    istorage = resource.get_irods_storage()
+    file_storage = ResourceFile._meta.get_field('resource_file').storage
+    short_id = resource.short_id
+    site_url = utils.current_site_url()
+    irods_home = settings.IRODS_HOME_COLLECTION
+    # only the columns the manifest needs, without building model instances
+    rows = list(ResourceFile.objects.filter(object_id=resource.id).values_list(
+        'pk', 'reference_file_path', 'reference_file_size', 'resource_file'))
+
+    def get_entry(row):
+        return _get_manifest_entry(istorage, file_storage, row[1:], short_id, site_url,
+                                   irods_home)
+
+    def get_entry_in_worker(row):
         try:
-            checksum = istorage.checksum(srcfile)
-        except SessionException as ex:
-            logger.error(ex.stderr)
+            return get_entry(row)
         finally:
-            data['url'] = fetch_url
+            # Django opens a connection per thread; don't leave one behind in a pool thread
+            # should the storage have used the database
+            connection.close()
 
-            if (f.reference_file_path):
-                data['length'] = istorage.size(srcfile)
-                data['filename'] = ref_file_name
-            else:
-                data['length'] = f.size
-                data['filename'] = f.file_name
-
-            if checksum is not None:
-                if checksum.startswith('sha'):
-                    data['sha256'] = base64.b64decode(checksum[4:]).encode('hex')
-                elif checksum.startswith('md5'):
-                    data['md5'] = base64.b64decode(checksum[4:]).encode('hex')
+    if len(rows) < 2:
+        data_list = [get_entry(row) for row in rows]
+    else:
+        # each entry costs one or two blocking iRODS round trips; overlap them
+        pool = ThreadPool(min(MANIFEST_WORKERS, len(rows)))
+        try:
+            data_list = pool.map(get_entry_in_worker, rows)
+        finally:
+            pool.close()
+            pool.join()
 
-            data_list.append(data)
+    # record sizes of references registered without one so later manifests need not ask iRODS;
+    # this runs on the calling thread, in its connection and transaction
+    for (pk, reference_file_path, reference_file_size, _), data in zip(rows, data_list):
+        if reference_file_path and not _recorded_size(reference_file_size) and data['length']:
+            ResourceFile.objects.filter(pk=pk).update(reference_file_size=str(data['length']))
 
-    return data_list
\ No newline at end of file
+    return data_list
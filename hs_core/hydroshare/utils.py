@@ -10,6 +10,7 @@ import copy
 from uuid import uuid4
 import errno
 import json
+import threading
 
 from django.apps import apps
 from django.http import Http404
@@ -21,6 +22,10 @@ from django.core.files import File
 from django.core.files.uploadedfile import UploadedFile
 from django.core.files.storage import DefaultStorage
 from django.core.validators import validate_email, URLValidator
+from django.db import connection
+from django.db.models import Q
+from django.dispatch import receiver
+from django.test.signals import setting_changed
 
 from mezzanine.conf import settings
 
@@ -49,13 +54,28 @@ class QuotaException(Exception):
     pass
 
 
+# the concrete resource classes, found by walking every installed model on the first call
+# of get_resource_types(); check_resource_type() and the API look types up through it
+_resource_types = None
+
+
 def get_resource_types():
-    resource_types = []
-    for model in apps.get_models():
-        if issubclass(model, AbstractResource) and model != BaseResource:
-            if not getattr(model, 'archived_model', False):
-                resource_types.append(model)
-    return resource_types
+    global _resource_types
+    if _resource_types is None:
+        _resource_types = tuple(
+            model for model in apps.get_models()
+            if issubclass(model, AbstractResource) and model != BaseResource and
+            not getattr(model, 'archived_model', False))
+    # hand out a fresh list so callers cannot alter the cached types
+    return list(_resource_types)
+
+
+@receiver(setting_changed)
+def _clear_resource_types(sender, setting, **kwargs):
+    """Forget the resource classes found so far once INSTALLED_APPS is overridden."""
+    global _resource_types
+    if setting == 'INSTALLED_APPS':
+        _resource_types = None
 
 
 def get_resource_instance(app, model_name, pk, or_404=True):
@@ -79,6 +99,42 @@ def get_resource_by_shortkey(shortkey, or_404=True):
     return content
 
 
+# resources looked up by short id during the current request; only present while
+# hs_core.middleware.ResourceCacheMiddleware is handling a request on this thread
+_request_resources = threading.local()
+
+
+def start_resource_cache():
+    _request_resources.cache = {}
+
+
+def clear_resource_cache(shortkey=None):
+    """
+    Drop the cached resource for shortkey, or the whole per-request cache if shortkey is None
+    """
+    cache = getattr(_request_resources, 'cache', None)
+    if cache is None:
+        return
+    if shortkey is None:
+        del _request_resources.cache
+    else:
+        cache.pop((connection.alias, shortkey), None)
+
+
+def get_resource_by_shortkey_cached(shortkey, or_404=True):
+    """
+    Same as get_resource_by_shortkey, but returns the instance already fetched for shortkey
+    earlier in the same request. Outside of a request (e.g., in celery tasks) nothing is cached.
+    """
+    cache = getattr(_request_resources, 'cache', None)
+    if cache is None:
+        return get_resource_by_shortkey(shortkey, or_404=or_404)
+    key = (connection.alias, shortkey)
+    if key not in cache:
+        cache[key] = get_resource_by_shortkey(shortkey, or_404=or_404)
+    return cache[key]
+
+
 def get_resource_by_minid(minid, or_404=True):
     try:
         res = BaseResource.objects.get(minid=minid)
@@ -144,6 +200,82 @@ def group_from_id(grp):
     return tgt
 
 
+def users_from_ids(users):
+    """
+    Resolve a list of users with one query rather than one user_from_id call per entry
+    :param users: list of User instances, usernames, email addresses, or user ids
+    :return: list of User instances in the same order as users
+    Raises Http404 if any entry does not match a user, like user_from_id does
+    """
+    keys = [u for u in users if not isinstance(u, User)]
+    by_username, by_email, by_id = {}, {}, {}
+    if keys:
+        ids = []
+        for key in keys:
+            try:
+                ids.append(int(key))
+            except (TypeError, ValueError):
+                pass
+        for tgt in User.objects.filter(Q(username__in=keys) | Q(email__in=keys) | Q(pk__in=ids)):
+            by_username[tgt.username] = tgt
+            by_email[tgt.email] = tgt
+            by_id[tgt.pk] = tgt
+
+    ret = []
+    for user in users:
+        if isinstance(user, User):
+            ret.append(user)
+            continue
+        # same precedence as user_from_id: username, then email, then id
+        tgt = by_username.get(user) or by_email.get(user)
+        if tgt is None:
+            try:
+                tgt = by_id.get(int(user))
+            except (TypeError, ValueError):
+                pass
+        if tgt is None:
+            raise Http404('User not found')
+        ret.append(tgt)
+    return ret
+
+
+def groups_from_ids(groups):
+    """
+    Resolve a list of groups with one query rather than one group_from_id call per entry
+    :param groups: list of Group instances, group names, or group ids
+    :return: list of Group instances in the same order as groups
+    Raises Http404 if any entry does not match a group, like group_from_id does
+    """
+    keys = [g for g in groups if not isinstance(g, Group)]
+    by_name, by_id = {}, {}
+    if keys:
+        ids = []
+        for key in keys:
+            try:
+                ids.append(int(key))
+            except (TypeError, ValueError):
+                pass
+        for tgt in Group.objects.filter(Q(name__in=keys) | Q(pk__in=ids)):
+            by_name[tgt.name] = tgt
+            by_id[tgt.pk] = tgt
+
+    ret = []
+    for grp in groups:
+        if isinstance(grp, Group):
+            ret.append(grp)
+            continue
+        tgt = by_name.get(grp)
+        if tgt is None:
+            try:
+                tgt = by_id.get(int(grp))
+            except (TypeError, ValueError):
+                pass
+        if tgt is None:
+            raise Http404('Group not found')
+        ret.append(tgt)
+    return ret
+
+
 # TODO: should be inside ResourceFile, and federation logic should be transparent.
 def get_resource_file_name_and_extension(res_file):
     """
@@ -247,7 +379,7 @@ def copy_resource_files_and_AVUs(src_res_id, dest_res_id):
     if src_res.resource_type.lower() == "collectionresource":
         # clone contained_res list of original collection and add to new collection
         # note that new collection resource will not contain "deleted resources"
-        tgt_res.resources = src_res.resources.all()
+        tgt_res.resources.set(list(src_res.resources.values_list('pk', flat=True)))
 
 
 def copy_and_create_metadata(src_res, dest_res):
@@ -273,15 +405,14 @@ def copy_and_create_metadata(src_res, dest_res):
     dest_res.metadata.create_element('date', type='modified', start_date=dest_res.updated)
 
     # copy date element to the new resource if exists
-    src_res_valid_date_filter = src_res.metadata.dates.all().filter(type='valid')
-    if src_res_valid_date_filter:
-        res_valid_date = src_res_valid_date_filter[0]
+    src_dates = src_res.metadata.dates
+    res_valid_date = src_dates.filter(type='valid').only('start_date', 'end_date').first()
+    if res_valid_date is not None:
         dest_res.metadata.create_element('date', type='valid', start_date=res_valid_date.start_date,
                                          end_date=res_valid_date.end_date)
 
-    src_res_avail_date_filter = src_res.metadata.dates.all().filter(type='available')
-    if src_res_avail_date_filter:
-        res_avail_date = src_res_avail_date_filter[0]
+    res_avail_date = src_dates.filter(type='available').only('start_date', 'end_date').first()
+    if res_avail_date is not None:
         dest_res.metadata.create_element('date', type='available',
                                          start_date=res_avail_date.start_date,
                                          end_date=res_avail_date.end_date)
@@ -607,7 +738,7 @@ def prepare_resource_default_metadata(resource, metadata, res_title):
 
     # only add the resource creator as the creator for metadata if there is not already
     # creator data in the metadata object
-    metadata_keys = [element.keys()[0].lower() for element in metadata]
+    metadata_keys = [next(iter(element)).lower() for element in metadata]
     if 'creator' not in metadata_keys:
         creator_data = get_party_data_from_user(resource.creator)
         metadata.append({'creator': creator_data})
@@ -750,6 +881,39 @@ def add_file_to_resource(resource, f, folder=None, source_name='', source_size=0
     return ret
 
 
+def add_files_to_resource(resource, files, folder=None):
+    """
+    Add several uploaded files to a Resource with one bulk INSERT of ResourceFile rows, and
+    add the 'format' metadata elements they need with one more.
+    :param resource: Resource to which files should be added
+    :param files: list of File-like objects to add to the resource
+    :param folder: folder within the resource in which to store the files
+    :return: list of the ResourceFile objects added, in the same order as files
+    """
+    if not files:
+        return []
+
+    # each file's content is written to storage as its row is prepared for the INSERT,
+    # exactly as ResourceFile.create does for a single file
+    res_files = [ResourceFile(content_object=resource, file_folder=folder,
+                              resource_file=File(f) if not isinstance(f, UploadedFile) else f)
+                 for f in files]
+    res_files = ResourceFile.objects.bulk_create(res_files, batch_size=200)
+
+    # TODO: generate this from data in ResourceFile rather than extension
+    metadata = resource.metadata
+    format_types = set(metadata.formats.values_list('value', flat=True))
+    new_formats = []
+    for f in files:
+        file_format_type = get_file_mime_type(f.name)
+        if file_format_type not in format_types:
+            format_types.add(file_format_type)
+            new_formats.append(('format', {'value': file_format_type}))
+    metadata.create_elements(new_formats)
+
+    return res_files
+
+
 def item_generator(json_input, lookup_id_key, id_prefix):
     """
     yield a list of id values
@@ -785,13 +949,23 @@ def harvest_ontology_ids_from_metadata(resource, f, id_prefix = 'UBERON:'):
     :param f: json-ld metadata file being uploaded
     :return: list of ontology ids
     """
-    openfile = File(f) if not isinstance(f, UploadedFile) else f
-    md = json.load(openfile)
+    harvest_ontology_ids_from_metadata_bulk(resource, [f], id_prefix=id_prefix)
+
+
+def harvest_ontology_ids_from_metadata_bulk(resource, files, id_prefix='UBERON:'):
+    """
+    harvest ontology ids from several json-ld metadata files, saving the resource once
+    :param files: json-ld metadata files being uploaded
+    :return: None; as with repeated single-file harvests, the last file that yields ids wins
+    """
     ids_str = ''
-    for id in item_generator(md, 'identifier', id_prefix):
-        ids_str += id +','
+    for f in files:
+        openfile = File(f) if not isinstance(f, UploadedFile) else f
+        md = json.load(openfile)
+        ids = list(item_generator(md, 'identifier', id_prefix))
+        if ids:
+            ids_str = ','.join(ids)
     if ids_str:
-        ids_str = ids_str[0:-1]
         resource.extra_data = {'ontology_ids': ids_str}
         resource.save()
 
@@ -0,0 +1,20 @@
+"""Keep resources looked up by short id for the duration of a single request."""
+
+from hs_core.hydroshare import utils
+
+
+class ResourceCacheMiddleware(object):
+    """Start an empty per-request resource cache and drop it when the request is done.
+
+    See hs_core.hydroshare.utils.get_resource_by_shortkey_cached
+    """
+
+    def process_request(self, request):
+        utils.start_resource_cache()
+
+    def process_response(self, request, response):
+        utils.clear_resource_cache()
+        return response
+
+    def process_exception(self, request, exception):
+        utils.clear_resource_cache()
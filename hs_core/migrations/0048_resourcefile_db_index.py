@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hs_core', '0047_auto_20190815_1721'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='resourcefile',
+            name='object_id',
+            field=models.PositiveIntegerField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='resourcefile',
+            name='reference_file_path',
+            field=models.CharField(blank=True, db_index=True, max_length=255, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hs_core', '0048_resourcefile_db_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='relation',
+            index=models.Index(fields=['object_id', 'type'], name='hs_core_relation_obj_type'),
+        ),
+    ]
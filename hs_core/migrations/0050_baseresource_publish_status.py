@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hs_core', '0049_relation_object_id_type_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='baseresource',
+            name='publish_status',
+            field=models.CharField(blank=True, choices=[('Pending', 'Pending'), ('Running', 'Running'), ('Done', 'Done'), ('Error', 'Error')], max_length=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='baseresource',
+            name='publish_message',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
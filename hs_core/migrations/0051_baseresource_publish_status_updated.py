@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hs_core', '0050_baseresource_publish_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='baseresource',
+            name='publish_status_updated',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -2,6 +2,8 @@
 
 import os.path
 import json
+import operator
+from collections import OrderedDict
 from uuid import uuid4
 from languages_iso import languages as iso_languages
 from dateutil import parser
@@ -14,8 +16,9 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.fields import GenericRelation
 from django.contrib.auth.models import User, Group
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
-from django.db.models import Q
+from django.db import IntegrityError, models
+from django.db.models import Count, Q
+from django.db.models.functions import Upper
 from django.db.models.signals import post_save
 from django.db import transaction
 from django.dispatch import receiver
@@ -238,6 +241,18 @@ class AbstractMetaDataElement(models.Model):
         """Pass through kwargs to object.create method."""
         return cls.objects.create(**kwargs)
 
+    @classmethod
+    def create_many(cls, kwargs_list):
+        """Create one element per kwargs dict in kwargs_list.
+
+        Elements that use the default create() are written with a single bulk INSERT;
+        elements with a custom create() are created one at a time through it so that their
+        validation still applies.
+        """
+        if cls.create.__func__ is not AbstractMetaDataElement.create.__func__:
+            return [cls.create(**kwargs) for kwargs in kwargs_list]
+        return cls.objects.bulk_create([cls(**kwargs) for kwargs in kwargs_list])
+
     @classmethod
     def update(cls, element_id, **kwargs):
         """Pass through kwargs to update specific metadata object."""
@@ -716,6 +731,11 @@ class Relation(AbstractMetaDataElement):
     type = models.CharField(max_length=100, choices=SOURCE_TYPES)
     value = models.CharField(max_length=500)
 
+    class Meta:
+        """Index the relations of a resource by type, the way versioning looks them up."""
+
+        indexes = [models.Index(fields=['object_id', 'type'], name='hs_core_relation_obj_type')]
+
     def __str__(self):
         """Return {type} {value} for string representation."""
         return "{type} {value}".format(type=self.type, value=self.value)
@@ -1482,6 +1502,32 @@ class Subject(AbstractMetaDataElement):
 
         return super(Subject, cls).create(**kwargs)
 
+    @classmethod
+    def create_many(cls, kwargs_list):
+        """Define custom bulk create method for Subject model.
+
+        Inserts all subjects together and then applies the duplicate check of create() to the
+        batch with one query. Like create(), the check compares values case-insensitively in
+        the database, so both paths fold case the same way.
+        """
+        if not kwargs_list:
+            return []
+        metadata_obj = kwargs_list[0]['content_object']
+        values = [kwargs['value'] for kwargs in kwargs_list if kwargs.get('value') is not None]
+        try:
+            with transaction.atomic():
+                subjects = cls.objects.bulk_create([cls(**kwargs) for kwargs in kwargs_list])
+                if values:
+                    matching = metadata_obj.subjects.filter(
+                        reduce(operator.or_, (Q(value__iexact=value) for value in values)))
+                    if matching.annotate(folded=Upper('value')).values('folded') \
+                            .annotate(num=Count('id')).filter(num__gt=1).exists():
+                        raise ValidationError("Subject element already exists.")
+        except IntegrityError:
+            # the same value twice in the batch
+            raise ValidationError("Subject element already exists.")
+        return subjects
+
     @classmethod
     def remove(cls, element_id):
         """Define custom remove method for Subject model."""
@@ -1598,6 +1644,17 @@ class AbstractResource(ResourcePermissionsMixin):
                                           )
     file_unpack_message = models.TextField(null=True, blank=True)
 
+    # progress of a publication running in a celery task; publish_message explains an 'Error'
+    publish_status = models.CharField(max_length=7,
+                                      null=True, blank=True,
+                                      choices=(('Pending', 'Pending'), ('Running', 'Running'),
+                                               ('Done', 'Done'), ('Error', 'Error'))
+                                      )
+    publish_message = models.TextField(null=True, blank=True)
+    # when publish_status last changed; a 'Pending' or 'Running' claim that has not changed for
+    # PUBLISH_CLAIM_TIMEOUT seconds belongs to a task that died and no longer blocks publishing
+    publish_status_updated = models.DateTimeField(null=True, blank=True)
+
     # TODO: why are old versions saved?
     bags = GenericRelation('hs_core.Bags', help_text='The bagits created from versions of '
                                                      'this resource', for_concrete_model=True)
@@ -1944,9 +2001,11 @@ class AbstractResource(ResourcePermissionsMixin):
     def delete(self, using=None):
         """Delete resource along with all of its metadata and data bag."""
         from hydroshare import hs_bagit
-        for fl in self.files.all():
-            # COUCH: delete of file objects now cascades.
-            fl.delete()
+        # the file contents go with the whole resource directory in delete_files_and_bag(),
+        # so the ResourceFile rows are removed without one storage call per file; no model
+        # depends on them and no delete signals are connected for them, so the deletion
+        # collector removes them all with a single DELETE
+        self.files.all().delete()
 
         hs_bagit.delete_files_and_bag(self)
         # TODO: Pabitra - delete_all_elements() may not be needed in Django 1.8 and later
@@ -2330,7 +2389,7 @@ class ResourceFile(models.Model):
     Represent a file in a resource.
     """
     # A ResourceFile is a sub-object of a resource, which can have several types.
-    object_id = models.PositiveIntegerField()
+    object_id = models.PositiveIntegerField(db_index=True)
     content_type = models.ForeignKey(ContentType)
     content_object = GenericForeignKey('content_type', 'object_id')
 
@@ -2348,7 +2407,7 @@ class ResourceFile(models.Model):
 
     # This is used to hold the reference path to an external file, e.g., a logical iRODS
     # path refering to a file stored in an external iRODS zone, a URL that points to an external file
-    reference_file_path = models.CharField(max_length=255, null=True, blank=True)
+    reference_file_path = models.CharField(max_length=255, null=True, blank=True, db_index=True)
     reference_file_size = models.CharField(max_length=15, null=True, blank=True)
 
     # we are using GenericForeignKey to allow resource file to be associated with any
@@ -2982,6 +3041,18 @@ class BaseResource(Page, AbstractResource):
         """
         return self.can_be_public_or_discoverable
 
+    @property
+    def publication_in_progress(self):
+        """Determine whether a celery task is publishing the resource.
+
+        A publication claimed longer ago than the PUBLISH_CLAIM_TIMEOUT setting (in seconds) is
+        taken to have been abandoned by a worker that was killed or crashed.
+        """
+        if self.publish_status not in ('Pending', 'Running') or not self.publish_status_updated:
+            return False
+        timeout = getattr(settings, 'PUBLISH_CLAIM_TIMEOUT', 60 * 60)
+        return (now() - self.publish_status_updated).total_seconds() < timeout
+
     @classmethod
     def get_supported_upload_file_types(cls):
         """Get supported upload types for a resource.
@@ -3740,6 +3811,30 @@ class CoreMetaData(models.Model):
         element = model_type.model_class().create(**kwargs)
         return element
 
+    def create_elements(self, elements):
+        """Create several metadata elements, batching the INSERTs per element type.
+
+        :param elements: iterable of (element_model_name, kwargs) pairs
+        :return: list of the created elements, grouped by element type
+
+        Elements of the same type are created together via the create_many() of the element
+        model, so element types without custom validation cost one INSERT per type.
+        """
+        model_classes = {}
+        batches = OrderedDict()
+        for element_model_name, kwargs in elements:
+            name = element_model_name.lower()
+            if name not in model_classes:
+                model_classes[name] = \
+                    self._get_metadata_element_model_type(name).model_class()
+            kwargs = dict(kwargs, content_object=self)
+            batches.setdefault(model_classes[name], []).append(kwargs)
+
+        created = []
+        for model_class, kwargs_list in batches.items():
+            created.extend(model_class.create_many(kwargs_list))
+        return created
+
     def update_element(self, element_model_name, element_id, **kwargs):
         """Update metadata element."""
         model_type = self._get_metadata_element_model_type(element_model_name)
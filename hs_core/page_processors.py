@@ -88,6 +88,8 @@ def get_page_context(page, user, resource_edit=False, extended_metadata_layout=N
     just_copied = False
     create_resource_error = None
     just_published = False
+    publication_pending = False
+    publication_error = None
     if request:
         validation_error = check_for_validation(request)
 
@@ -103,9 +105,19 @@ def get_page_context(page, user, resource_edit=False, extended_metadata_layout=N
         if 'resource_creation_error' in request.session:
             del request.session['resource_creation_error']
 
-        just_published = request.session.get('just_published', False)
-        if 'just_published' in request.session:
-            del request.session['just_published']
+        # the publish view queues a task; report the publication as submitted until the task
+        # has either published the resource or failed
+        if request.session.get('publication_pending') == content_model.short_id:
+            if content_model.raccess.published:
+                just_published = True
+                del request.session['publication_pending']
+            elif content_model.publication_in_progress:
+                publication_pending = True
+            else:
+                # failed, or abandoned by a worker that died
+                publication_error = content_model.publish_message or \
+                    "The publication did not finish. Please try again."
+                del request.session['publication_pending']
 
     bag_url = content_model.bag_url
 
@@ -198,6 +210,8 @@ def get_page_context(page, user, resource_edit=False, extended_metadata_layout=N
                    'just_created': just_created,
                    'just_copied': just_copied,
                    'just_published': just_published,
+                   'publication_pending': publication_pending,
+                   'publication_error': publication_error,
                    'bag_url': bag_url,
                    'show_content_files': show_content_files,
                    'discoverable': discoverable,
@@ -77,3 +77,37 @@ def add_zip_file_contents_to_resource(pk, zip_file_path):
 def notify_fts_indexer(res_id):
     url = '{}{}'.format(settings.FTS_INDEX_URL, '?guid='+res_id)
     response = requests.get(url)
+
+
+@shared_task(bind=True, max_retries=5)
+def publish_resource_task(self, user_pk, res_id, publish_type):
+    """Publish a resource outside of the request that asked for it.
+
+    Registering a resource calls DataCite or the MINID service and FairShake, and may create
+    the bag, which can take many seconds. A failed HTTP request that persists through the
+    retries of the HTTP session is retried with exponential backoff; registrations that already
+    succeeded are saved on the resource and not repeated. publish_resource records every
+    failure in the resource's publish_status and publish_message for the resource page to
+    show; the task then fails with it.
+    """
+    # Import here to avoid circular reference
+    from django.contrib.auth.models import User
+    from hs_core.hydroshare.resource import publish_resource, _set_publish_status
+    try:
+        try:
+            user = User.objects.get(pk=user_pk)
+        except User.DoesNotExist:
+            _set_publish_status(res_id, 'Error', "The user who asked to publish the resource "
+                                                 "no longer exists.")
+            raise
+        publish_resource(user, res_id, publish_type)
+    except requests.RequestException as ex:
+        if self.request.retries >= self.max_retries:
+            logger.exception("Publishing resource %s failed; giving up", res_id)
+            raise
+        logger.warning("Publishing resource %s failed, retrying: %s", res_id, ex)
+        _set_publish_status(res_id, 'Pending', "Retrying after a failed request: {}".format(ex))
+        raise self.retry(exc=ex, countdown=2 ** self.request.retries * 10)
+    except Exception:
+        logger.exception("Publishing resource %s failed", res_id)
+        raise
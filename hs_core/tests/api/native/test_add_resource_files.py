@@ -1,7 +1,9 @@
+import json
 import os
 import unittest
 
 from django.contrib.auth.models import User, Group
+from django.core.files.uploadedfile import SimpleUploadedFile
 
 from hs_core.hydroshare.resource import add_resource_files, create_resource
 from hs_core.hydroshare.users import create_account
@@ -100,3 +102,22 @@ class TestAddResourceFiles(MockIRODSTestCaseMixin, unittest.TestCase):
         self.assertRaises(QuotaException)
 
         res.delete()
+
+    def test_add_files_keeps_order(self):
+        res = create_resource(resource_type='GenericResource',
+                              owner=self.user,
+                              title='Test Resource',
+                              metadata=[],)
+        res.files.all().delete()
+
+        # a .jsonld file goes to the 'metadata' folder with the other .jsonld files, but is
+        # returned in the position it was given
+        md_file = SimpleUploadedFile('test.jsonld', json.dumps({'identifier': 'UBERON:0001'}))
+        added = add_resource_files(res, self.myfile1, md_file, self.myfile2)
+
+        self.assertEqual([f.file_name for f in added], [self.n1, 'test.jsonld', self.n2])
+        self.assertEqual([f.file_folder for f in added], [None, 'metadata', None])
+        self.assertEqual(res.files.all().count(), 3)
+        res.refresh_from_db()
+        self.assertEqual(res.extra_data, {'ontology_ids': 'UBERON:0001'})
+        res.delete()
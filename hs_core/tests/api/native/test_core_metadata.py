@@ -1366,6 +1366,46 @@ class TestCoreMetadata(MockIRODSTestCaseMixin, TestCase):
         sub_2 = self.res.metadata.subjects.all().filter(value='sub-2').first()
         self.assertRaises(Exception, lambda: resource.delete_metadata_element(self.res.short_id, 'subject', sub_2.id))
 
+    def test_create_elements_subject_duplicates(self):
+        # the resource has the subjects 'kw1' and 'kw2' - duplicates are found case-insensitively,
+        # the same as with create_metadata_element(), and a failed batch adds no subjects
+        metadata = self.res.metadata
+        for values in (['kw3', 'KW1'], ['kw5', 'KW5'], ['kw6', 'kw6']):
+            with self.assertRaises(ValidationError):
+                metadata.create_elements([('subject', {'value': value}) for value in values])
+            self.assertEqual(metadata.subjects.all().count(), 2,
+                             msg="Subjects of a failed batch were created.")
+
+        created = metadata.create_elements([('subject', {'value': 'kw3'}),
+                                            ('subject', {'value': 'kw4'})])
+        self.assertEqual([sub.value for sub in created], ['kw3', 'kw4'])
+        self.assertEqual(metadata.subjects.all().count(), 4)
+
+    def test_create_elements_uses_custom_create(self):
+        # FundingAgency overrides create() to validate the agency name, which create_elements()
+        # must still apply
+        metadata = self.res.metadata
+        with self.assertRaises(ValidationError):
+            metadata.create_elements([('fundingagency', {'agency_name': 'NSF'}),
+                                      ('fundingagency', {'agency_name': ' '})])
+        self.assertFalse(metadata.funding_agencies.filter(agency_name=' ').exists())
+
+    def test_create_elements_mixed_types(self):
+        # elements come back grouped per element type, in the order each type first appears
+        created = self.res.metadata.create_elements([
+            ('subject', {'value': 'kw3'}),
+            ('source', {'derived_from': 'http://hydroshare.org/resource/001'}),
+            ('Subject', {'value': 'kw4'}),
+            ('fundingagency', {'agency_name': 'NSF'})
+        ])
+        self.assertEqual([type(element) for element in created],
+                         [Subject, Subject, Source, FundingAgency])
+        self.assertEqual([str(element) for element in created],
+                         ['kw3', 'kw4', 'http://hydroshare.org/resource/001', 'NSF'])
+        self.assertEqual(self.res.metadata.subjects.all().count(), 4)
+        self.assertEqual(self.res.metadata.sources.all().count(), 1)
+        self.assertEqual(self.res.metadata.funding_agencies.all().count(), 1)
+
     def test_type(self):
         # type element is auto created at the resource creation (see test_auto_element_creation)
         # adding a 2nd type element should raise exception
@@ -8,7 +8,9 @@ from unittest import TestCase
 import datetime as dtime
 
 from django.contrib.auth.models import Group, User
+from django.test import override_settings
 from django.utils import timezone
+from mock import patch
 
 from hs_core.hydroshare import resource, get_resource_by_shortkey
 from hs_core.tests.api.utils import MyTemporaryUploadedFile
@@ -375,6 +377,27 @@ class TestCreateResource(MockIRODSTestCaseMixin, TestCase):
         if res:
             res.delete()
 
+    def test_create_resource_notifies_fts_indexer_once(self):
+        # the notifications for adding the files and creating the resource are coalesced
+        with override_settings(FTS_URL='http://fts.example.com'), \
+                patch('hs_core.hydroshare.resource.notify_fts_indexer') as notify:
+            res = resource.create_resource('GenericResource',
+                                           self.user,
+                                           'My Test Resource',
+                                           files=(self.file_one, self.file_two))
+        notify.assert_called_once_with(res.short_id)
+        res.delete()
+
+    def test_fts_notifications_dropped_when_block_fails(self):
+        with patch('hs_core.hydroshare.resource.notify_fts_indexer') as notify:
+            with self.assertRaises(ValueError):
+                with resource._coalesce_fts_notifications():
+                    resource._notify_fts_indexer_on_commit('abc')
+                    raise ValueError
+            # outside of a block the notification is sent on commit, i.e. at once here
+            resource._notify_fts_indexer_on_commit('abc')
+        notify.assert_called_once_with('abc')
+
     def test_create_resource_with_zipfile(self):
 
         # Make a zip file
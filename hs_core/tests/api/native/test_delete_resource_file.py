@@ -60,3 +60,34 @@ class TestDeleteResourceFile(MockIRODSTestCaseMixin, unittest.TestCase):
             [os.path.basename(rf.resource_file.name) for rf in resource_file_objects],
             msg='the added test file is not deleted from the resource'
         )
+
+    def test_delete_files_only(self):
+        names = ['myfile1.txt', 'myfile2.txt']
+        for name in names:
+            with open(name, 'w') as f:
+                f.write("Test text file in {}".format(name))
+        try:
+            files = [open(name, 'r') for name in names]
+            hydroshare.add_resource_files(self.res, *files)
+            for f in files:
+                f.close()
+        finally:
+            for name in names:
+                os.remove(name)
+
+        to_delete = list(ResourceFile.objects.filter(object_id=self.res.pk)
+                         .exclude(resource_file__endswith=self.file.name))
+        self.assertEqual(len(to_delete), 2)
+        storage_names = [rf.resource_file.name for rf in to_delete]
+        storage = to_delete[0].resource_file.storage
+        self.assertTrue(all(storage.exists(name) for name in storage_names))
+
+        # this is the api we are testing
+        short_paths = hydroshare.delete_resource_files_only(self.res, to_delete)
+
+        self.assertEqual(sorted(short_paths), names)
+        # both the records and the stored files are gone; the other file is untouched
+        resource_file_objects = ResourceFile.objects.filter(object_id=self.res.pk)
+        self.assertEqual([os.path.basename(rf.resource_file.name) for rf in resource_file_objects],
+                         [self.file.name])
+        self.assertFalse(any(storage.exists(name) for name in storage_names))
@@ -2,6 +2,7 @@ from django.contrib.auth.models import Group
 from django.test import TestCase
 
 from hs_core import hydroshare
+from hs_core.hydroshare import utils
 from hs_core.testing import MockIRODSTestCaseMixin
 
 
@@ -33,3 +34,33 @@ class TestGetResourceByShortkeyAPI(MockIRODSTestCaseMixin, TestCase):
             resource,
             hydroshare.get_resource_by_shortkey(resource.short_id)
         )
+
+    def test_get_resource_by_shortkey_cached(self):
+        self.user_creator = hydroshare.create_account(
+            'creator@usu.edu',
+            username='creator',
+            first_name='Creator_FirstName',
+            last_name='Creator_LastName',
+            superuser=False,
+            groups=[]
+        )
+        resource = hydroshare.create_resource(
+            'GenericResource',
+            self.user_creator,
+            'My Test Resource'
+        )
+
+        # outside of a request nothing is cached
+        self.assertIsNot(utils.get_resource_by_shortkey_cached(resource.short_id),
+                         utils.get_resource_by_shortkey_cached(resource.short_id))
+
+        utils.start_resource_cache()
+        try:
+            cached = utils.get_resource_by_shortkey_cached(resource.short_id)
+            self.assertEqual(resource, cached)
+            self.assertIs(cached, utils.get_resource_by_shortkey_cached(resource.short_id))
+
+            utils.clear_resource_cache(resource.short_id)
+            self.assertIsNot(cached, utils.get_resource_by_shortkey_cached(resource.short_id))
+        finally:
+            utils.clear_resource_cache()
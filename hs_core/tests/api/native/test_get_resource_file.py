@@ -3,6 +3,7 @@ import os
 from unittest import TestCase
 
 from django.contrib.auth.models import User, Group
+from django.core.exceptions import ObjectDoesNotExist
 
 from hs_core import hydroshare
 from hs_core.models import ResourceFile, GenericResource
@@ -50,3 +51,8 @@ class TestGetResourceFile(MockIRODSTestCaseMixin, TestCase):
             os.path.basename(res_file_object.name),
             msg='file name did not match'
         )
+
+    def test_get_missing_file(self):
+        # test that a file name not in the resource raises ObjectDoesNotExist
+        with self.assertRaises(ObjectDoesNotExist):
+            hydroshare.get_resource_file(self.res.short_id, 'no-such-file.txt')
@@ -1,4 +1,5 @@
 from django.test import TestCase
+from django.test.signals import setting_changed
 from hs_core import hydroshare
 from hs_core.models import BaseResource
 
@@ -12,3 +13,22 @@ class TestGetResourceTypesAPI(TestCase):
         for res_type in res_types:
             self.assertEqual(issubclass(res_type, BaseResource), True)
 
+    def test_check_resource_type(self):
+        # each resource type name resolves to its class; unknown names are rejected
+        for res_type in hydroshare.get_resource_types():
+            self.assertIs(hydroshare.check_resource_type(res_type.__name__), res_type)
+
+        with self.assertRaises(NotImplementedError):
+            hydroshare.check_resource_type('NoSuchResource')
+
+    def test_get_resource_types_cached(self):
+        res_types = hydroshare.get_resource_types()
+        # callers get their own list, which they cannot use to alter the cached types
+        res_types.pop()
+        self.assertEqual(len(hydroshare.get_resource_types()), len(res_types) + 1)
+
+        # overriding the installed apps drops the cache
+        setting_changed.send(sender=self.__class__, setting='INSTALLED_APPS', value=[],
+                             enter=True)
+        self.assertIsNone(hydroshare.utils._resource_types)
+        self.assertEqual(len(hydroshare.get_resource_types()), len(res_types) + 1)
@@ -39,4 +39,11 @@ class TestGroupFromId(TestCase):
             hydroshare.group_from_id(self.group.pk),
             self.group,
             msg='lookup group id failed'
-        )
\ No newline at end of file
+        )
+
+    def test_groups_from_ids(self):
+        self.assertEqual(
+            hydroshare.groups_from_ids([self.group.pk, self.group.name, self.group]),
+            [self.group] * 3,
+            msg='bulk lookup of groups failed'
+        )
@@ -2,9 +2,13 @@
 import unittest
 
 from django.contrib.auth.models import Group
-from django.test import TestCase
+from django.test import TestCase, override_settings
+
+from mock import Mock, patch
 
 from hs_core import hydroshare
+from hs_core.hydroshare import resource
+from hs_core.models import BaseResource
 from hs_core.testing import MockIRODSTestCaseMixin
 
 
@@ -76,3 +80,34 @@ class TestPublishResource(MockIRODSTestCaseMixin, TestCase):
 
         # there should now published date type metadata element
         self.assertTrue(self.pub_res.metadata.dates.filter(type='published').exists())
+
+    def test_register_publication_skips_saved_registrations(self):
+        # a publication retried after a failure must not mint a second DOI or FairShake object
+        BaseResource.objects.filter(short_id=self.res.short_id).update(doi='10.5555/saved',
+                                                                       assessment_id=7)
+        res = hydroshare.get_resource_by_shortkey(self.res.short_id)
+        with patch('hs_core.hydroshare.resource._publish_http') as http, \
+                patch('hs_core.hydroshare.resource.get_resource_files_manifest') as manifest:
+            ident_md_args = resource._register_publication(res, 'DOI')
+
+        self.assertFalse(http.put.called)
+        self.assertFalse(http.post.called)
+        self.assertFalse(manifest.called)
+        self.assertEqual(ident_md_args,
+                         {'name': 'doi', 'url': 'https://ors.datacite.org/10.5555/saved'})
+
+    @override_settings(FAIRSHAKE_PASSWORD='secret')
+    def test_register_publication_saves_doi_before_fairshake(self):
+        res = hydroshare.get_resource_by_shortkey(self.res.short_id)
+        manifest = [{'sha256': 'ab', 'length': 1, 'url': 'http://example.com/file'}]
+        with patch('hs_core.hydroshare.resource._publish_http') as http, \
+                patch('hs_core.hydroshare.resource.get_resource_files_manifest',
+                      return_value=manifest):
+            http.put.return_value = Mock(status_code=200, json=lambda: {'@id': '10.5555/new'})
+            http.post.return_value = Mock(status_code=500, text='unavailable')
+            with self.assertRaises(resource.PublishException):
+                resource._register_publication(res, 'doi')
+
+        res = BaseResource.objects.get(short_id=self.res.short_id)
+        self.assertEqual(res.doi, '10.5555/new')
+        self.assertIsNone(res.assessment_id)
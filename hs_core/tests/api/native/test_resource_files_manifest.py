@@ -0,0 +1,184 @@
+import base64
+import hashlib
+import threading
+import unittest
+
+from django.contrib.auth.models import Group
+from django.db.models.query import QuerySet
+from django.test import TestCase
+
+from mock import Mock, patch
+
+from hs_core import hydroshare
+from hs_core.hydroshare import resource
+from hs_core.models import ResourceFile
+from hs_core.testing import MockIRODSTestCaseMixin
+from django_irods.icommands import SessionException
+
+
+class TestGetManifestEntry(unittest.TestCase):
+    site_url = 'http://example.com'
+
+    def _entry(self, istorage, row, file_storage=None):
+        return resource._get_manifest_entry(istorage, file_storage or Mock(), row, 'abc123',
+                                            self.site_url, '/zone/home/proxy')
+
+    def test_sha2_checksum_decoded_to_hex(self):
+        digest = hashlib.sha256(b'hello').digest()
+        istorage = Mock()
+        istorage.checksum.return_value = 'sha2:' + base64.b64encode(digest)
+
+        data = self._entry(istorage, ('/zone/file.txt', '5', None))
+
+        self.assertEqual(data['sha256'], hashlib.sha256(b'hello').hexdigest())
+        self.assertNotIn('md5', data)
+
+    def test_md5_checksum_decoded_to_hex(self):
+        istorage = Mock()
+        istorage.checksum.return_value = 'md5:' + base64.b64encode(hashlib.md5(b'hello').digest())
+
+        data = self._entry(istorage, ('/zone/file.txt', '5', None))
+
+        self.assertEqual(data['md5'], hashlib.md5(b'hello').hexdigest())
+        self.assertNotIn('sha256', data)
+
+    def test_checksum_failure_leaves_out_checksum(self):
+        istorage = Mock()
+        istorage.checksum.side_effect = SessionException(3, '', 'no such file')
+
+        data = self._entry(istorage, ('/zone/file.txt', '5', None))
+
+        self.assertNotIn('sha256', data)
+        self.assertNotIn('md5', data)
+        self.assertEqual(data['length'], 5)
+
+    def test_reference_uses_recorded_size(self):
+        istorage = Mock()
+        istorage.checksum.return_value = None
+
+        data = self._entry(istorage, ('/zone/dir/file.txt', '5', None))
+
+        self.assertFalse(istorage.size.called)
+        self.assertEqual(data, {
+            'url': 'http://example.com/django_irods/download/abc123/zone/dir/file.txt',
+            'length': 5,
+            'filename': 'file.txt'})
+        istorage.checksum.assert_called_once_with('/zone/dir/file.txt')
+
+    def test_reference_without_size_asks_irods(self):
+        for recorded_size in (None, '', '0', 'unknown'):
+            istorage = Mock()
+            istorage.checksum.return_value = None
+            istorage.size.return_value = 12
+
+            data = self._entry(istorage, ('/zone/file.txt', recorded_size, None))
+
+            self.assertEqual(data['length'], 12)
+            istorage.size.assert_called_once_with('/zone/file.txt')
+
+    def test_stored_file(self):
+        istorage = Mock()
+        istorage.checksum.return_value = None
+        file_storage = Mock()
+        file_storage.size.return_value = 9
+
+        data = self._entry(istorage, (None, None, 'abc123/data/contents/file.txt'), file_storage)
+
+        self.assertEqual(data, {
+            'url': 'http://example.com/django_irods/download/abc123/data/contents/file.txt',
+            'length': 9,
+            'filename': 'file.txt'})
+        istorage.checksum.assert_called_once_with(
+            '/zone/home/proxy/abc123/data/contents/file.txt')
+        file_storage.size.assert_called_once_with('abc123/data/contents/file.txt')
+        self.assertFalse(istorage.size.called)
+
+
+class TestResourceFilesManifest(MockIRODSTestCaseMixin, TestCase):
+    def setUp(self):
+        super(TestResourceFilesManifest, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='CommonsShare Author')
+        self.user = hydroshare.create_account(
+            'creator@usu.edu',
+            username='creator',
+            first_name='Creator_FirstName',
+            last_name='Creator_LastName',
+            superuser=False,
+            groups=[]
+        )
+        self.res = hydroshare.create_resource(
+            resource_type='GenericResource',
+            owner=self.user,
+            title='Test Resource Files Manifest'
+        )
+        self.checksum_threads = []
+
+    def _add_reference(self, path, size=None):
+        return ResourceFile.objects.create(content_object=self.res, reference_file_path=path,
+                                           reference_file_size=size)
+
+    def _istorage(self, size=42):
+        def checksum(path):
+            self.checksum_threads.append(threading.current_thread())
+            return 'sha2:' + base64.b64encode(b'\x01\x02')
+
+        istorage = Mock()
+        istorage.checksum.side_effect = checksum
+        istorage.size.return_value = size
+        return istorage
+
+    def _get_manifest(self, istorage):
+        with patch.object(self.res, 'get_irods_storage', return_value=istorage), \
+                patch('hs_core.hydroshare.resource.connection') as connection:
+            manifest = resource.get_resource_files_manifest(self.res)
+        return manifest, connection
+
+    def test_manifest_entries_fetched_in_worker_threads(self):
+        for path in ('/zone/file1.txt', '/zone/file2.txt', '/zone/file3.txt'):
+            self._add_reference(path)
+
+        with patch.object(resource, 'MANIFEST_WORKERS', 2):
+            manifest, connection = self._get_manifest(self._istorage())
+
+        self.assertEqual(sorted(entry['filename'] for entry in manifest),
+                         ['file1.txt', 'file2.txt', 'file3.txt'])
+        self.assertTrue(all(entry['sha256'] == '0102' for entry in manifest))
+        self.assertEqual(len(self.checksum_threads), 3)
+        self.assertNotIn(threading.current_thread(), self.checksum_threads)
+        # every worker closes the database connection it may have opened
+        self.assertEqual(connection.close.call_count, 3)
+        # the sizes learned from iRODS are recorded by the calling thread
+        self.assertEqual(list(ResourceFile.objects.filter(object_id=self.res.id)
+                              .values_list('reference_file_size', flat=True)),
+                         ['42', '42', '42'])
+
+    def test_single_file_manifest_built_on_calling_thread(self):
+        self._add_reference('/zone/file1.txt', size='7')
+
+        manifest, connection = self._get_manifest(self._istorage())
+
+        self.assertEqual(len(manifest), 1)
+        self.assertEqual(manifest[0]['length'], 7)
+        self.assertEqual(self.checksum_threads, [threading.current_thread()])
+        # the calling thread's connection must be left open
+        self.assertFalse(connection.close.called)
+
+    def test_reference_sizes_written_back_on_calling_thread(self):
+        missing = self._add_reference('/zone/file1.txt')
+        recorded = self._add_reference('/zone/file2.txt', size='7')
+        update_threads = []
+        update = QuerySet.update
+
+        def record_update(queryset, **kwargs):
+            update_threads.append(threading.current_thread())
+            return update(queryset, **kwargs)
+
+        with patch.object(QuerySet, 'update', autospec=True, side_effect=record_update):
+            self._get_manifest(self._istorage(size=42))
+
+        # only the reference registered without a size is updated, and by the calling thread
+        self.assertEqual(update_threads, [threading.current_thread()])
+        missing.refresh_from_db()
+        recorded.refresh_from_db()
+        self.assertEqual(missing.reference_file_size, '42')
+        self.assertEqual(recorded.reference_file_size, '7')
@@ -0,0 +1,80 @@
+import errno
+import os
+import shutil
+import tempfile
+import unittest
+import zipfile
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from mock import patch
+
+from hs_core.hydroshare import resource
+
+
+def _zip_bytes(comment=b''):
+    buf = BytesIO()
+    zf = zipfile.ZipFile(buf, 'w')
+    zf.writestr('file1.txt', 'Test text file in file1.txt')
+    zf.comment = comment
+    zf.close()
+    return buf.getvalue()
+
+
+class TestLooksLikeZip(unittest.TestCase):
+    def test_zip(self):
+        self.assertTrue(resource._looks_like_zip(SimpleUploadedFile('test.zip', _zip_bytes())))
+
+    def test_zip_with_comment(self):
+        f = SimpleUploadedFile('test.zip', _zip_bytes(comment=b'c' * 60000))
+        self.assertTrue(resource._looks_like_zip(f))
+
+    def test_not_zip(self):
+        f = SimpleUploadedFile('test.txt', b'Test text file in test.txt\n' * 5000)
+        self.assertFalse(resource._looks_like_zip(f))
+
+    def test_file_shorter_than_zip_record(self):
+        self.assertFalse(resource._looks_like_zip(SimpleUploadedFile('test.zip', b'PK\x03\x04')))
+        self.assertFalse(resource._looks_like_zip(SimpleUploadedFile('test.zip', b'')))
+
+    def test_read_position_kept(self):
+        f = SimpleUploadedFile('test.zip', _zip_bytes())
+        f.seek(5)
+        self.assertTrue(resource._looks_like_zip(f))
+        self.assertEqual(f.tell(), 5)
+
+    def test_file_without_size(self):
+        # falls back on zipfile for files that do not know their size
+        self.assertTrue(resource._looks_like_zip(BytesIO(_zip_bytes())))
+        self.assertFalse(resource._looks_like_zip(BytesIO(b'Test text')))
+
+
+class TestStageUpload(unittest.TestCase):
+    def setUp(self):
+        self.upload_dir = tempfile.mkdtemp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.src = os.path.join(self.upload_dir, 'upload.zip')
+        with open(self.src, 'wb') as f:
+            f.write(_zip_bytes())
+
+    def tearDown(self):
+        shutil.rmtree(self.upload_dir)
+        shutil.rmtree(self.tmp_dir)
+
+    def test_upload_linked(self):
+        dst = resource._stage_upload(self.src, self.tmp_dir)
+
+        self.assertEqual(dst, os.path.join(self.tmp_dir, 'upload.zip'))
+        self.assertTrue(os.path.samefile(self.src, dst))
+
+    def test_upload_copied_when_link_fails(self):
+        with patch('hs_core.hydroshare.resource.os.link',
+                   side_effect=OSError(errno.EXDEV, 'Invalid cross-device link')):
+            dst = resource._stage_upload(self.src, self.tmp_dir)
+
+        self.assertEqual(dst, os.path.join(self.tmp_dir, 'upload.zip'))
+        self.assertFalse(os.path.samefile(self.src, dst))
+        with open(self.src, 'rb') as src, open(dst, 'rb') as copy:
+            self.assertEqual(src.read(), copy.read())
+        self.assertTrue(zipfile.is_zipfile(dst))
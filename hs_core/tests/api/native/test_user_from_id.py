@@ -48,7 +48,10 @@ class TestUserFromId(TestCase):
             msg='lookup by user id failed'
         )
 
-
-
-
-
+    def test_users_from_ids(self):
+        self.assertEqual(
+            hydroshare.users_from_ids([self.user.pk, self.user.email, self.user.username,
+                                       self.user]),
+            [self.user] * 4,
+            msg='bulk lookup of users failed'
+        )
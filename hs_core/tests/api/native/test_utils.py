@@ -1,5 +1,8 @@
+import json
+
 from django.contrib.auth.models import Group
 from django.contrib.sites.models import Site
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import TestCase
 
 from mezzanine.conf import settings
@@ -113,4 +116,42 @@ class TestUtils(MockIRODSTestCaseMixin, TestCase):
         utils.resource_modified(self.res, self.user2)
         modified_date2 = self.res.metadata.dates.filter(type='modified').first()
         self.assertTrue((modified_date2.start_date - modified_date1.start_date).total_seconds() > 0)
-        self.assertEquals(self.res.last_changed_by, self.user2)
\ No newline at end of file
+        self.assertEquals(self.res.last_changed_by, self.user2)
+
+    def test_add_files_to_resource(self):
+        files = [SimpleUploadedFile('file1.txt', 'one'),
+                 SimpleUploadedFile('file2.txt', 'two'),
+                 SimpleUploadedFile('file3.csv', 'three')]
+        added = utils.add_files_to_resource(self.res, files, folder='data')
+
+        self.assertEquals([f.file_name for f in added], ['file1.txt', 'file2.txt', 'file3.csv'])
+        self.assertTrue(all(f.pk is not None for f in added))
+        self.assertEquals(self.res.files.filter(file_folder='data').count(), 3)
+        # one format element per mime type
+        self.assertEquals(sorted(self.res.metadata.formats.values_list('value', flat=True)),
+                          sorted([utils.get_file_mime_type('file3.csv'), 'text/plain']))
+
+        # formats the resource already has are not added again
+        utils.add_files_to_resource(self.res, [SimpleUploadedFile('file4.txt', 'four')])
+        self.assertEquals(self.res.metadata.formats.filter(value='text/plain').count(), 1)
+        self.assertEquals(utils.add_files_to_resource(self.res, []), [])
+
+    def test_harvest_ontology_ids_from_metadata_bulk(self):
+        md1 = {'identifier': 'UBERON:0001', 'about': [{'identifier': 'UBERON:0002'},
+                                                      {'identifier': 'CL:0003'}]}
+        md2 = {'identifier': 'UBERON:0004'}
+        no_ids = {'identifier': 'CL:0005'}
+
+        utils.harvest_ontology_ids_from_metadata_bulk(
+            self.res, [SimpleUploadedFile('md1.jsonld', json.dumps(md1))])
+        self.res.refresh_from_db()
+        self.assertEquals(sorted(self.res.extra_data['ontology_ids'].split(',')),
+                          ['UBERON:0001', 'UBERON:0002'])
+
+        # as with one harvest per file, the last file that has ids wins
+        utils.harvest_ontology_ids_from_metadata_bulk(
+            self.res, [SimpleUploadedFile('md1.jsonld', json.dumps(md1)),
+                       SimpleUploadedFile('md2.jsonld', json.dumps(md2)),
+                       SimpleUploadedFile('no_ids.jsonld', json.dumps(no_ids))])
+        self.res.refresh_from_db()
+        self.assertEquals(self.res.extra_data, {'ontology_ids': 'UBERON:0004'})
@@ -14,21 +14,23 @@ from hs_core.hydroshare import resource
 from django.contrib.sites.models import Site
 
 class HSRESTTestCase(APITestCase):
-    def setUp(self):
-        self.hostname = socket.gethostname()
-        self.resource_url = "http://example.com/resource/{res_id}/"
-        self.maxDiff = None
-        self.client = APIClient()
-
-        self.group, _ = Group.objects.get_or_create(name='CommonsShare Author')
-        # create a user
-        self.user = users.create_account(
+    @classmethod
+    def setUpTestData(cls):
+        cls.group, _ = Group.objects.get_or_create(name='CommonsShare Author')
+        # create a user once per class; each test's transaction is rolled back
+        cls.user = users.create_account(
             'test_user@email.com',
             username='testuser',
             first_name='some_first_name',
             last_name='some_last_name',
             superuser=False)
 
+    def setUp(self):
+        self.hostname = socket.gethostname()
+        self.resource_url = "http://example.com/resource/{res_id}/"
+        self.maxDiff = None
+        self.client = APIClient()
+
         self.client.force_authenticate(user=self.user)
 
         self.resources_to_delete = []
@@ -37,8 +39,6 @@ class HSRESTTestCase(APITestCase):
         for r in self.resources_to_delete:
             resource.delete_resource(r)
 
-        self.user.delete()
-
     def getResourceBag(self, res_id, exhaust_stream=True):
         """Get resource bag from iRODS, following redirects.
 
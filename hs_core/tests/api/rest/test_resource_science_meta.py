@@ -1,3 +1,5 @@
+import json
+
 from rest_framework import status
 
 from hs_core.hydroshare import resource
@@ -5,155 +7,156 @@ from hs_core.hydroshare.utils import resource_post_create_actions
 from .base import HSRESTTestCase
 
 
+# core metadata shared by the generic resource PUT tests
+BASE_PUT_DATA = {
+    "title": "New Title",
+    "description": "New Description",
+    "subjects": [
+        {"value": "subject1"},
+        {"value": "subject2"},
+        {"value": "subject3"}
+    ],
+    "contributors": [{
+        "name": "Test Name 1",
+        "organization": "Org 1"
+    }, {
+        "name": None,
+        "organization": "Org 2"
+    }],
+    "creators": [{
+        "name": "Creator",
+        "organization": None
+    }],
+    "coverages": [{
+        "type": "box",
+        "value": {
+            "northlimit": 43.19716728247476,
+            "projection": "WGS 84 EPSG:4326",
+            "name": "A whole bunch of the atlantic ocean",
+            "units": "Decimal degrees",
+            "southlimit": 23.8858376999,
+            "eastlimit": -19.16015625,
+            "westlimit": -62.75390625
+        }
+    }],
+    "dates": [
+        {
+            "type": "valid",
+            "start_date": "2016-12-07T00:00:00Z",
+            "end_date": "2018-12-07T00:00:00Z"
+        }
+    ],
+    "language": "fre",
+    "rights": "CCC",
+    "sources": [
+        {
+            "derived_from": "Source 3"
+        },
+        {
+            "derived_from": "Source 2"
+        }
+    ]
+}
+
+
 class TestResourceScienceMetadata(HSRESTTestCase):
 
-    def setUp(self):
-        super(TestResourceScienceMetadata, self).setUp()
+    # netcdf specific metadata shared by the netcdf PUT tests
+    NETCDF_PUT_DATA = {
+        "originalcoverage": {
+            "value": {
+                "northlimit": '12', "projection": "transverse_mercator",
+                "units": "meter", "southlimit": '10',
+                "eastlimit": '23', "westlimit": '2'
+            },
+            "projection_string_text": '+proj=tmerc +lon_0=-111.0 +lat_0=0.0 +x_0=500000.0 '
+                                      '+y_0=0.0 +k_0=0.9996',
+            "projection_string_type": 'Proj4 String'
+        },
+        "variables": [
+            {
+                "name": "SWE",
+                "type": "Float",
+                "shape": "y,x,time",
+                "unit": "m",
+                "missing_value": "-9999",
+                "descriptive_name": "Snow water equivalent",
+                "method": "model simulation of UEB"
+            },
+            {
+                "name": "x",
+                "unit": "Centimeter"
+            }
+        ]
+    }
+    # serialized once; tests sending the payload unchanged pass this as the request body
+    NETCDF_PUT_JSON = json.dumps(NETCDF_PUT_DATA)
+
+    @classmethod
+    def setUpTestData(cls):
+        super(TestResourceScienceMetadata, cls).setUpTestData()
 
-        self.rtype = 'GenericResource'
-        self.title = 'My Test resource'
-        res = resource.create_resource(self.rtype,
-                                       self.user,
-                                       self.title)
-        self.pid = res.short_id
-        self.resources_to_delete.append(self.pid)
+        cls.rtype = 'GenericResource'
+        cls.title = 'My Test resource'
+        res = resource.create_resource(cls.rtype,
+                                       cls.user,
+                                       cls.title)
+        cls.pid = res.short_id
+        cls.sysmeta_url = "/hsapi/resource/{res_id}/scimeta/elements/".format(res_id=cls.pid)
 
         # create another resource for testing relation metadata
         another_res = resource.create_resource('GenericResource',
-                                               self.user,
+                                               cls.user,
                                                'My another Test resource')
-        self.pid2 = another_res.short_id
-        self.resources_to_delete.append(self.pid2)
+        cls.pid2 = another_res.short_id
+
+        # parsing the netcdf file is the costliest part of the fixture, so the
+        # netcdf tests share one resource
+        with open('hs_core/tests/data/netcdf_valid.nc', 'rb') as file_to_upload:
+            netcdf_res = cls._new_resource("NetcdfResource", file_to_upload)
+        cls.netcdf_pid = netcdf_res.short_id
+        cls.netcdf_sysmeta_url = "/hsapi/resource/{res_id}/scimeta/elements/".format(
+            res_id=cls.netcdf_pid)
+
+    @classmethod
+    def tearDownClass(cls):
+        # the database rows are rolled back, but the iRODS collections are not
+        for pid in (cls.pid, cls.pid2, cls.netcdf_pid):
+            resource.delete_resource(pid)
+        super(TestResourceScienceMetadata, cls).tearDownClass()
 
     def test_get_scimeta(self):
         # Get the resource system metadata
-        sysmeta_url = "/hsapi/resource/{res_id}/scimeta/elements/".format(res_id=self.pid)
-        response = self.client.get(sysmeta_url)
+        response = self.client.get(self.sysmeta_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # content = json.loads(response.content)
 
     def test_put_scimeta_generic_resource(self):
-        sysmeta_url = "/hsapi/resource/{res_id}/scimeta/elements/".format(res_id=self.pid)
-        put_data = {
-            "title": "New Title",
-            "description": "New Description",
-            "subjects": [
-                {"value": "subject1"},
-                {"value": "subject2"},
-                {"value": "subject3"}
-            ],
-            "contributors": [{
-                "name": "Test Name 1",
-                "organization": "Org 1"
-            }, {
-                "name": None,
-                "organization": "Org 2"
-            }],
-            "creators": [{
-                "name": "Creator",
-                "organization": None
-            }],
-            "coverages": [{
-                "type": "box",
-                "value": {
-                    "northlimit": 43.19716728247476,
-                    "projection": "WGS 84 EPSG:4326",
-                    "name": "A whole bunch of the atlantic ocean",
-                    "units": "Decimal degrees",
-                    "southlimit": 23.8858376999,
-                    "eastlimit": -19.16015625,
-                    "westlimit": -62.75390625
-                }
-            }],
-            "dates": [
-                {
-                    "type": "valid",
-                    "start_date": "2016-12-07T00:00:00Z",
-                    "end_date": "2018-12-07T00:00:00Z"
-                }
-            ],
-            "language": "fre",
-            "rights": "CCC",
-            "sources": [
-                {
-                    "derived_from": "Source 3"
-                },
-                {
-                    "derived_from": "Source 2"
-                }
-            ],
-            "relations": [
-                {
-                    "type": "isCopiedFrom",
-                    "value": "https://www.hydroshare.org/resource/{}/".format(self.pid2)
-                },
-                {
-                    "type": "isExecutedBy",
-                    "value": "https://www.hydroshare.org/resource/{}/".format(self.pid2)
-                }
-            ],
-        }
-        response = self.client.put(sysmeta_url, put_data, format='json')
+        put_data = dict(BASE_PUT_DATA, relations=[
+            {
+                "type": "isCopiedFrom",
+                "value": "https://www.hydroshare.org/resource/{}/".format(self.pid2)
+            },
+            {
+                "type": "isExecutedBy",
+                "value": "https://www.hydroshare.org/resource/{}/".format(self.pid2)
+            }
+        ])
+        response = self.client.put(self.sysmeta_url, put_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
 
     def test_put_scimeta_generic_resource_double_none(self):
-        sysmeta_url = "/hsapi/resource/{res_id}/scimeta/elements/".format(res_id=self.pid)
-        put_data = {
-            "title": "New Title",
-            "description": "New Description",
-            "subjects": [
-                {"value": "subject1"},
-                {"value": "subject2"},
-                {"value": "subject3"}
-            ],
-            "contributors": [{
-                "name": "Test Name 1",
-                "organization": "Org 1"
-            }, {
+        put_data = dict(BASE_PUT_DATA, creators=[
+            {
+                "name": "Creator",
+                "organization": None
+            },
+            {
                 "name": None,
-                "organization": "Org 2"
-            }],
-            "creators": [
-                {
-                    "name": "Creator",
-                    "organization": None
-                },
-                {
-                    "name": None,
-                    "organization": None
-                }
-            ],
-            "coverages": [{
-                "type": "box",
-                "value": {
-                    "northlimit": 43.19716728247476,
-                    "projection": "WGS 84 EPSG:4326",
-                    "name": "A whole bunch of the atlantic ocean",
-                    "units": "Decimal degrees",
-                    "southlimit": 23.8858376999,
-                    "eastlimit": -19.16015625,
-                    "westlimit": -62.75390625
-                }
-            }],
-            "dates": [
-                {
-                    "type": "valid",
-                    "start_date": "2016-12-07T00:00:00Z",
-                    "end_date": "2018-12-07T00:00:00Z"
-                }
-            ],
-            "language": "fre",
-            "rights": "CCC",
-            "sources": [
-                {
-                    "derived_from": "Source 3"
-                },
-                {
-                    "derived_from": "Source 2"
-                }
-            ]
-        }
-        response = self.client.put(sysmeta_url, put_data, format='json')
+                "organization": None
+            }
+        ])
+        response = self.client.put(self.sysmeta_url, put_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_put_scimeta_composite_resource_with_core_metadata(self):
@@ -377,130 +380,22 @@ class TestResourceScienceMetadata(HSRESTTestCase):
     def test_put_scimeta_netcdf_resource_with_core_metadata(self):
         # testing bulk metadata update that includes both core metadata and resource specific
         # metadata update
-
-        # create a netcdf resource
-        netcdf_file = 'hs_core/tests/data/netcdf_valid.nc'
-        file_to_upload = open(netcdf_file, "r")
-        self._create_resource(resource_type="NetcdfResource", file_to_upload=file_to_upload)
-        sysmeta_url = "/hsapi/resource/{res_id}/scimeta/elements/".format(
-            res_id=self.resource.short_id)
-        put_data = {
-            "title": "New Title",
-            "description": "New Description",
-            "subjects": [
-                {"value": "subject1"},
-                {"value": "subject2"},
-                {"value": "subject3"}
-            ],
-            "contributors": [{
-                "name": "Test Name 1",
-                "organization": "Org 1"
-            }, {
-                "name": "Test Name 2",
-                "organization": "Org 2"
-            }],
-            "creators": [{
-                "name": "Creator",
-                "organization": None
-            }],
-            "coverages": [{
-                "type": "box",
-                "value": {
-                    "northlimit": 43.19716728247476,
-                    "projection": "WGS 84 EPSG:4326",
-                    "name": "A whole bunch of the atlantic ocean",
-                    "units": "Decimal degrees",
-                    "southlimit": 23.8858376999,
-                    "eastlimit": -19.16015625,
-                    "westlimit": -62.75390625
-                }
-            }],
-            "dates": [
-                {
-                    "type": "valid",
-                    "start_date": "2016-12-07T00:00:00Z",
-                    "end_date": "2018-12-07T00:00:00Z"
-                }
-            ],
-            "language": "fre",
-            "rights": "CCC",
-            "sources": [
-                {
-                    "derived_from": "Source 3"
-                },
-                {
-                    "derived_from": "Source 2"
-                }
-            ],
-            "originalcoverage": {
-                "value": {
-                    "northlimit": '12', "projection": "transverse_mercator",
-                    "units": "meter", "southlimit": '10',
-                    "eastlimit": '23', "westlimit": '2'
-                },
-                "projection_string_text": '+proj=tmerc +lon_0=-111.0 +lat_0=0.0 +x_0=500000.0 '
-                                          '+y_0=0.0 +k_0=0.9996',
-                "projection_string_type": 'Proj4 String'
-            },
-            "variables": [
-                {
-                    "name": "SWE",
-                    "type": "Float",
-                    "shape": "y,x,time",
-                    "unit": "m",
-                    "missing_value": "-9999",
-                    "descriptive_name": "Snow water equivalent",
-                    "method": "model simulation of UEB"
-                },
-                {
-                    "name": "x",
-                    "unit": "Centimeter"
-                }
-            ]
-        }
-        response = self.client.put(sysmeta_url, put_data, format='json')
+        contributors = [{
+            "name": "Test Name 1",
+            "organization": "Org 1"
+        }, {
+            "name": "Test Name 2",
+            "organization": "Org 2"
+        }]
+        put_data = dict(BASE_PUT_DATA, contributors=contributors, **self.NETCDF_PUT_DATA)
+        response = self.client.put(self.netcdf_sysmeta_url, put_data, format='json')
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
-        self.resource.delete()
 
     def test_put_scimeta_netcdf_resource_without_core_metadata(self):
         # testing bulk metadata update that only updates resource specific metadata
-
-        # create a netcdf resource
-        netcdf_file = 'hs_core/tests/data/netcdf_valid.nc'
-        file_to_upload = open(netcdf_file, "r")
-        self._create_resource(resource_type="NetcdfResource", file_to_upload=file_to_upload)
-        sysmeta_url = "/hsapi/resource/{res_id}/scimeta/elements/".format(
-            res_id=self.resource.short_id)
-        put_data = {
-            "originalcoverage": {
-                "value": {
-                    "northlimit": '12', "projection": "transverse_mercator",
-                    "units": "meter", "southlimit": '10',
-                    "eastlimit": '23', "westlimit": '2'
-                },
-                "projection_string_text": '+proj=tmerc +lon_0=-111.0 +lat_0=0.0 +x_0=500000.0 '
-                                          '+y_0=0.0 +k_0=0.9996',
-                "projection_string_type": 'Proj4 String'
-            },
-            "variables": [
-                {
-                    "name": "SWE",
-                    "type": "Float",
-                    "shape": "y,x,time",
-                    "unit": "m",
-                    "missing_value": "-9999",
-                    "descriptive_name": "Snow water equivalent",
-                    "method": "model simulation of UEB"
-                },
-                {
-                    "name": "x",
-                    "unit": "Centimeter"
-                }
-            ]
-        }
-        response = self.client.put(sysmeta_url, put_data, format='json')
+        response = self.client.put(self.netcdf_sysmeta_url, self.NETCDF_PUT_JSON,
+                                   content_type='application/json')
         self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
-        self.resource.delete()
 
     def test_put_scimeta_raster_resource_with_core_metadata(self):
         # testing bulk metadata update that includes both core metadata and resource specific
@@ -1337,14 +1232,19 @@ class TestResourceScienceMetadata(HSRESTTestCase):
         self.resource.delete()
 
     def _create_resource(self, resource_type, file_to_upload=None):
+        self.resource = self._new_resource(resource_type, file_to_upload)
+
+    @classmethod
+    def _new_resource(cls, resource_type, file_to_upload=None):
         files = ()
         if file_to_upload is not None:
             files = (file_to_upload,)
-        self.resource = resource.create_resource(
+        res = resource.create_resource(
             resource_type=resource_type,
-            owner=self.user,
+            owner=cls.user,
             title="Testing bulk metadata update for resource type - {}".format(resource_type),
             files=files
             )
-        resource_post_create_actions(resource=self.resource, user=self.user,
-                                     metadata=self.resource.metadata)
+        resource_post_create_actions(resource=res, user=cls.user,
+                                     metadata=res.metadata)
+        return res
@@ -3,6 +3,9 @@ import shutil
 
 from django.contrib.auth.models import Group
 from django.core.urlresolvers import reverse
+from django.test import override_settings
+
+from mock import patch
 
 from rest_framework import status
 
@@ -164,3 +167,33 @@ class TestAddDeleteResourceFiles(MockIRODSTestCaseMixin, ViewTestCase):
         self.assertEqual(self.gen_res.files.count(), 0)
 
         hydroshare.delete_resource(self.gen_res.short_id)
+
+    def test_delete_multiple_files_notifies_fts_indexer_once(self):
+        post_data = {'file1': (self.txt_file_name_1, open(self.txt_file_path_1), 'text/plain'),
+                     'file2': (self.txt_file_name_2, open(self.txt_file_path_2), 'text/plain')}
+        url = reverse('add_files_to_resource', kwargs={'shortkey': self.gen_res.short_id})
+        request = self.factory.post(url, data=post_data)
+        request.user = self.user
+        request.META['HTTP_X_REQUESTED_WITH'] = 'XMLHttpRequest'
+        self.set_request_message_attributes(request)
+        add_files_to_resource(request, shortkey=self.gen_res.short_id)
+        self.assertEqual(self.gen_res.files.count(), 2)
+
+        file_ids = ','.join([str(f.id) for f in self.gen_res.files.all()])
+        url = reverse('delete_multiple_files', kwargs={'shortkey': self.gen_res.short_id})
+        request = self.factory.post(url, data={'file_ids': file_ids})
+        request.user = self.user
+        request.META['HTTP_REFERER'] = 'some-url'
+        self.set_request_message_attributes(request)
+        self.add_session_to_request(request)
+        # the test transaction never commits, so run the on-commit notifications at once
+        with override_settings(FTS_URL='http://fts.example.com'), \
+                patch('hs_core.hydroshare.resource.transaction.on_commit',
+                      side_effect=lambda func: func()), \
+                patch('hs_core.hydroshare.resource.notify_fts_indexer') as notify:
+            delete_multiple_files(request, shortkey=self.gen_res.short_id)
+
+        self.assertEqual(self.gen_res.files.count(), 0)
+        notify.assert_called_once_with(self.gen_res.short_id)
+
+        hydroshare.delete_resource(self.gen_res.short_id)
@@ -0,0 +1,175 @@
+import datetime
+import os
+import shutil
+
+import requests
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.utils.timezone import now
+
+from mock import patch
+
+from hs_core import hydroshare
+from hs_core.hydroshare.resource import PUBLISH_REQUIREMENTS_MESSAGE, PublishException, \
+    publish_resource
+from hs_core.models import BaseResource
+from hs_core.tasks import publish_resource_task
+from hs_core.views import publish
+from hs_core.testing import MockIRODSTestCaseMixin, ViewTestCase
+
+
+def _register_doi(resource, publish_type):
+    # stands in for the calls to DataCite and FairShake
+    BaseResource.objects.filter(short_id=resource.short_id).update(doi='10.5555/test-doi',
+                                                                   assessment_id=1)
+    return {'name': 'doi', 'url': 'https://ors.datacite.org/10.5555/test-doi'}
+
+
+class TestPublish(MockIRODSTestCaseMixin, ViewTestCase):
+    def setUp(self):
+        super(TestPublish, self).setUp()
+        self.group, _ = Group.objects.get_or_create(name='CommonsShare Author')
+        self.user = hydroshare.create_account(
+            'john@gmail.com',
+            username='john',
+            first_name='John',
+            last_name='Clarson',
+            superuser=False,
+            password='jhmypassword',
+            groups=[]
+        )
+        self.unpublishable_res = hydroshare.create_resource(
+            resource_type='GenericResource',
+            owner=self.user,
+            title='Generic Resource Publish Testing-1'
+        )
+
+        self.txt_file_name = 'text.txt'
+        self.txt_file_path = os.path.join(self.temp_dir, self.txt_file_name)
+        txt = open(self.txt_file_path, 'w')
+        txt.write("Hello World\n")
+        txt.close()
+        self.txt_file = open(self.txt_file_path, 'r')
+        files = [UploadedFile(self.txt_file, name=self.txt_file_name)]
+        metadata_dict = [
+            {'description': {'abstract': 'My test abstract'}},
+            {'subject': {'value': 'sub-1'}}
+        ]
+        self.res = hydroshare.create_resource(
+            resource_type='GenericResource',
+            owner=self.user,
+            title='Generic Resource Publish Testing-2',
+            files=files,
+            metadata=metadata_dict
+        )
+
+    def tearDown(self):
+        self.txt_file.close()
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
+        super(TestPublish, self).tearDown()
+
+    def _publish(self, res):
+        url = '/hsapi/_internal/{}/publish/doi/'.format(res.short_id)
+        request = self.factory.post(url)
+        request.user = self.user
+        request.META['HTTP_REFERER'] = '/resource/{}/'.format(res.short_id)
+        self.set_request_message_attributes(request)
+        self.add_session_to_request(request)
+        # the test transaction never commits, so run the on-commit task dispatch at once; the
+        # task itself runs eagerly under the test runner
+        with patch('hs_core.views.transaction.on_commit', side_effect=lambda func: func()):
+            publish(request, shortkey=res.short_id, publish_type='doi')
+        return request
+
+    def test_publish(self):
+        with patch('hs_core.hydroshare.resource._register_publication',
+                   side_effect=_register_doi):
+            request = self._publish(self.res)
+
+        res = hydroshare.get_resource_by_shortkey(self.res.short_id)
+        self.assertTrue(res.raccess.published)
+        self.assertTrue(res.raccess.immutable)
+        self.assertEqual(res.publish_status, 'Done')
+        self.assertEqual(res.doi, '10.5555/test-doi')
+        self.assertTrue(res.metadata.identifiers.filter(name='doi').exists())
+        self.assertTrue(res.metadata.dates.filter(type='published').exists())
+        # the resource page reports the publication until it sees the resource published
+        self.assertEqual(request.session['publication_pending'], self.res.short_id)
+
+    def test_publish_failure_is_recorded(self):
+        # the task fails with the error, which propagates here as the task runs eagerly
+        with patch('hs_core.hydroshare.resource._register_publication',
+                   side_effect=PublishException("DataCite is down")):
+            with self.assertRaises(PublishException):
+                self._publish(self.res)
+
+        res = hydroshare.get_resource_by_shortkey(self.res.short_id)
+        self.assertFalse(res.raccess.published)
+        self.assertEqual(res.publish_status, 'Error')
+        self.assertEqual(res.publish_message, "DataCite is down")
+
+    def test_publish_unpublishable_resource(self):
+        with patch('hs_core.views.publish_resource_task') as task:
+            request = self._publish(self.unpublishable_res)
+
+        self.assertFalse(task.apply_async.called)
+        self.assertEqual(request.session['validation_error'], PUBLISH_REQUIREMENTS_MESSAGE)
+        self.assertNotIn('publication_pending', request.session)
+        self.unpublishable_res.refresh_from_db()
+        self.assertIsNone(self.unpublishable_res.publish_status)
+
+    def _set_claim(self, publish_status, age):
+        BaseResource.objects.filter(short_id=self.res.short_id).update(
+            publish_status=publish_status, publish_status_updated=now() - age)
+
+    def test_publish_refused_while_in_progress(self):
+        self._set_claim('Running', datetime.timedelta(minutes=1))
+        with patch('hs_core.views.publish_resource_task') as task:
+            request = self._publish(self.res)
+
+        self.assertFalse(task.apply_async.called)
+        self.assertEqual(request.session['validation_error'],
+                         "This resource is already being published.")
+
+    def test_publish_after_claim_expired(self):
+        # a worker that died left the resource claimed; the claim no longer blocks publishing
+        self._set_claim('Running', datetime.timedelta(days=1))
+        with patch('hs_core.hydroshare.resource._register_publication',
+                   side_effect=_register_doi):
+            self._publish(self.res)
+
+        res = hydroshare.get_resource_by_shortkey(self.res.short_id)
+        self.assertTrue(res.raccess.published)
+        self.assertEqual(res.publish_status, 'Done')
+
+    def test_publish_published_resource_settles_status(self):
+        self.res.raccess.published = True
+        self.res.raccess.save()
+        self._set_claim('Pending', datetime.timedelta(0))
+
+        with self.assertRaises(ValidationError):
+            publish_resource(self.user, self.res.short_id, 'doi')
+
+        self.res.refresh_from_db()
+        self.assertEqual(self.res.publish_status, 'Done')
+        self.assertFalse(self.res.publication_in_progress)
+
+    def test_publish_task_retries_failed_requests(self):
+        with patch('hs_core.hydroshare.resource._register_publication',
+                   side_effect=requests.HTTPError("503 Service Unavailable")) as register:
+            with self.assertRaises(requests.HTTPError):
+                publish_resource_task.apply((self.user.pk, self.res.short_id, 'doi'))
+
+        self.assertEqual(register.call_count, publish_resource_task.max_retries + 1)
+        self.res.refresh_from_db()
+        self.assertEqual(self.res.publish_status, 'Error')
+        self.assertEqual(self.res.publish_message, "503 Service Unavailable")
+
+    def test_publish_task_records_missing_user(self):
+        with self.assertRaises(User.DoesNotExist):
+            publish_resource_task.apply((self.user.pk + 1000, self.res.short_id, 'doi'))
+
+        self.res.refresh_from_db()
+        self.assertEqual(self.res.publish_status, 'Error')
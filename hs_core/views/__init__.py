@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 import json
 import datetime
+from functools import partial
 import pytz
 import logging
 
@@ -17,7 +18,7 @@ from django.http import HttpResponseRedirect, HttpResponse, JsonResponse, \
     HttpResponseBadRequest, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, render, redirect
 from django.core import signing
-from django.db import Error, IntegrityError
+from django.db import Error, IntegrityError, transaction
 from django import forms
 from django.views.generic import TemplateView
 from django.core.urlresolvers import reverse
@@ -38,7 +39,9 @@ from hs_core.hydroshare.utils import get_resource_by_shortkey, resource_modified
 from .utils import authorize, upload_from_irods, ACTION_TO_AUTHORIZE, get_my_resources_list, \
     send_action_to_take_email, get_coverage_data_dict, get_size_and_avu_for_irods_ref_files
 from hs_core.models import GenericResource, resource_processor, CoreMetaData, Subject
-from hs_core.hydroshare.resource import METADATA_STATUS_SUFFICIENT, METADATA_STATUS_INSUFFICIENT
+from hs_core.hydroshare.resource import METADATA_STATUS_SUFFICIENT, METADATA_STATUS_INSUFFICIENT, \
+    PUBLISH_REQUIREMENTS_MESSAGE, _coalesce_fts_notifications, _set_publish_status
+from hs_core.tasks import publish_resource_task
 
 from . import resource_rest_api
 from . import resource_metadata_rest_api
@@ -520,17 +523,19 @@ def delete_multiple_files(request, shortkey, *args, **kwargs):
     # file_ids is a string of file ids separated by comma
     f_ids = request.POST['file_ids']
     f_id_list = f_ids.split(',')
-    for f_id in f_id_list:
-        f_id = f_id.strip()
-        try:
-            hydroshare.delete_resource_file(shortkey, f_id, user)  # calls resource_modified
-        except ObjectDoesNotExist as ex:
-            # Since some specific resource types such as feature resource type delete all other
-            # dependent content files together when one file is deleted, we make this specific
-            # ObjectDoesNotExist exception as legitimate in deplete_multiple_files() without
-            # raising this specific exception
-            logger.debug(ex.message)
-            continue
+    # one full text search notification for the whole batch rather than one per file
+    with _coalesce_fts_notifications():
+        for f_id in f_id_list:
+            f_id = f_id.strip()
+            try:
+                hydroshare.delete_resource_file(shortkey, f_id, user)  # calls resource_modified
+            except ObjectDoesNotExist as ex:
+                # Since some specific resource types such as feature resource type delete all
+                # other dependent content files together when one file is deleted, we make this
+                # specific ObjectDoesNotExist exception as legitimate in deplete_multiple_files()
+                # without raising this specific exception
+                logger.debug(ex.message)
+                continue
     request.session['resource-mode'] = 'edit'
     return HttpResponseRedirect(request.META['HTTP_REFERER'])
 
@@ -669,14 +674,23 @@ def publish(request, shortkey, publish_type, *args, **kwargs):
     # only resource owners are allowed to change resource flags (e.g published)
     res, _, _ = authorize(request, shortkey, needed_permission=ACTION_TO_AUTHORIZE.SET_RESOURCE_FLAG)
 
-    try:
-        hydroshare.publish_resource(request.user, shortkey, publish_type)
-    except ValidationError as exp:
-        request.session['validation_error'] = exp.message
+    # registering with the external services is slow, so only check here whether the resource
+    # can be published at all and leave the rest to a celery task
+    if res.raccess.published:
+        request.session['validation_error'] = "This resource is already published."
+    elif res.publication_in_progress:
+        request.session['validation_error'] = "This resource is already being published."
+    elif not res.can_be_published:
+        request.session['validation_error'] = PUBLISH_REQUIREMENTS_MESSAGE
     else:
-        request.session['just_published'] = True
+        _set_publish_status(shortkey, 'Pending')
+        transaction.on_commit(partial(publish_resource_task.apply_async,
+                                      (request.user.pk, shortkey, publish_type)))
+        # the resource page reports the publication as submitted until the task has published it
+        request.session['publication_pending'] = shortkey
     return HttpResponseRedirect(request.META['HTTP_REFERER'])
 
+
 def set_resource_flag(request, shortkey, *args, **kwargs):
     # only resource owners are allowed to change resource flags
     res, _, user = authorize(request, shortkey, needed_permission=ACTION_TO_AUTHORIZE.SET_RESOURCE_FLAG)
@@ -25,6 +25,7 @@ from mezzanine.conf import settings
 
 from hs_core import hydroshare
 from hs_core.hydroshare import check_resource_type, delete_resource_file
+from hs_core.hydroshare.resource import _coalesce_fts_notifications
 from hs_core.models import AbstractMetaDataElement, BaseResource, GenericResource, Relation, \
     ResourceFile, get_user
 from hs_core.signals import pre_metadata_element_create, post_delete_file_from_resource
@@ -659,10 +660,11 @@ def zip_folder(user, res_id, input_coll_path, output_zip_fname, bool_remove_orig
     link_irods_file_to_django(resource, output_zip_full_path)
 
     if bool_remove_original:
-        for f in ResourceFile.objects.filter(object_id=resource.id):
-            full_path_name = f.storage_path
-            if res_coll_input in full_path_name and output_zip_full_path not in full_path_name:
-                delete_resource_file(res_id, f.short_path, user)
+        with _coalesce_fts_notifications():
+            for f in ResourceFile.objects.filter(object_id=resource.id):
+                full_path_name = f.storage_path
+                if res_coll_input in full_path_name and output_zip_full_path not in full_path_name:
+                    delete_resource_file(res_id, f.short_path, user)
 
         # remove empty folder in iRODS
         istorage.delete(res_coll_input)